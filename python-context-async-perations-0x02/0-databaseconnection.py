@@ -1,11 +1,18 @@
+import os
 import sqlite3
+import sys
+
+# The PRAGMA profiles live in python-decorators-0x01/sqlite_profile.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-decorators-0x01'))
+import sqlite_profile
 
 class DatabaseConnection:
-    def __init__(self, db_name):
+    def __init__(self, db_name, profile=None):
         self.db_name = db_name
+        self.pragmas = sqlite_profile.pragmas_for(profile)  # ValueError for an unknown profile name
         self.connection = None
     def __enter__(self):
-        self.connection = sqlite3.connect(self.db_name)
+        self.connection = sqlite_profile.apply_profile(sqlite3.connect(self.db_name), self.pragmas)
         return self.connection
     def __exit__(self, exc_type, exc_value, traceback):
         if self.connection:
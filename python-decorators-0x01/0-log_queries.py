@@ -1,26 +1,44 @@
+import time
 import sqlite3
 import functools 
-from datetime import datetime
+
+from query_helpers import STATEMENT_CACHE_SIZE, fetch_all
+from query_profiler import print_query
 
 # also check time of execution
-def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Log the query and the time of execution
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        query = args[0] if args else kwargs.get('query', '')
-        print(f"Executing query: {query}")
-        print(f"[{timestamp}] Executing function: {func.__doc__}")
-        return func(*args, **kwargs)
+def log_queries(func=None, *, profiler=None):
+    """Logs each query; with profiler=QueryProfiler(...) it records timings instead of printing"""
+    def decorator(func):
+        if profiler is not None:
+            @functools.wraps(func)
+            def profiled(*args, **kwargs):
+                start = time.perf_counter_ns()
+                result = error = None
+                try:
+                    result = func(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    profiler.record_call(args, kwargs, result, time.perf_counter_ns() - start, error)
+            return profiled
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Log the query and the time of execution
+            print_query(func, args, kwargs)
+            return func(*args, **kwargs)
 
-    return wrapper
+        return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @log_queries
 def fetch_all_users(query):
-    conn = sqlite3.connect('users.db')
-    cursor = conn.cursor()
-    cursor.execute(query)
-    results = cursor.fetchall()
+    conn = sqlite3.connect('users.db', cached_statements=STATEMENT_CACHE_SIZE)
+    results = fetch_all(conn, query)
     conn.close()
     return results
 
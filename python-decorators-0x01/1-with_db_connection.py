@@ -1,18 +1,23 @@
-import sqlite3 
 import functools
 
-def with_db_connection(func):
-    with sqlite3.connect('users.db') as conn:
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(conn, *args, **kwargs)
-        return wrapper
+import sqlite_profile
+from query_helpers import fetch_one
+
+def with_db_connection(func=None, *, database='users.db', profile=None):
+    """Passes a connection as the first argument; profile names a sqlite_profile.PROFILES entry"""
+    def decorator(func):
+        with sqlite_profile.connect(database, profile) as conn:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return func(conn, *args, **kwargs)
+            return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @with_db_connection 
 def get_user_by_id(conn, user_id): 
-    cursor = conn.cursor() 
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,)) 
-    return cursor.fetchone()
+    return fetch_one(conn, "SELECT * FROM users WHERE id = ?", (user_id,))
 
 #### Fetch user by ID with automatic connection handling 
 
@@ -1,5 +1,9 @@
 import sqlite3 
 import functools
+import threading
+
+from query_cache import default_cache as query_cache, track_writes
+from query_helpers import execute_many
 
 def with_db_connection(func):
     with sqlite3.connect('users.db') as conn:
@@ -9,23 +13,64 @@ def with_db_connection(func):
         return wrapper
     
 # transactional(func) that ensures a function running a database operation is wrapped inside a transaction.If the function raises an error, rollback; otherwise commit the transaction.
+# Nested transactional scopes per connection on this thread; inner ones use SAVEPOINTs
+_scopes = threading.local()
+
 def transactional(func):
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        depths = getattr(_scopes, 'depths', None)
+        if depths is None:
+            depths = _scopes.depths = {}
+        depth = depths.get(id(conn), 0)
+        if depth:
+            return _nested(conn, depth, depths, func, args, kwargs)
+        depths[id(conn)] = 1
         try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()  # Commit the transaction if no exception occurs
-            return result
-        except Exception as e:
-            conn.rollback()  # Rollback the transaction on error
-            raise e  # Re-raise the exception for further handling
+            # Record tables written in this transaction so cached reads of them can be dropped
+            with track_writes(conn) as written:
+                try:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN")  # Inner savepoints must nest inside a real transaction
+                    result = func(conn, *args, **kwargs)
+                    conn.commit()  # Commit the transaction if no exception occurs
+                except Exception as e:
+                    conn.rollback()  # Rollback the transaction on error
+                    raise e  # Re-raise the exception for further handling
+        finally:
+            del depths[id(conn)]
+        query_cache.invalidate_tables(written)
+        return result
     return wrapper
 
+def _nested(conn, depth, depths, func, args, kwargs):
+    """Runs an inner transactional scope as a savepoint of the outer transaction"""
+    savepoint = f"transactional_{depth}"
+    conn.execute(f"SAVEPOINT {savepoint}")
+    depths[id(conn)] = depth + 1
+    try:
+        result = func(conn, *args, **kwargs)
+    except Exception as e:
+        conn.execute(f"ROLLBACK TO {savepoint}")  # Undo only this scope's work
+        conn.execute(f"RELEASE {savepoint}")
+        raise e
+    finally:
+        depths[id(conn)] = depth
+    conn.execute(f"RELEASE {savepoint}")
+    return result
+
 @with_db_connection 
 @transactional 
 def update_user_email(conn, user_id, new_email): 
     cursor = conn.cursor() 
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id)) 
+
+@with_db_connection
+@transactional
+def update_user_emails(conn, updates):
+    """Bulk form of update_user_email: updates is an iterable of (user_id, new_email)"""
+    return execute_many(conn, "UPDATE users SET email = ? WHERE id = ?",
+                        ((new_email, user_id) for user_id, new_email in updates))
 #### Update user's email with automatic transaction handling 
 
 update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
@@ -1,7 +1,10 @@
-import time
 import sqlite3 
+import inspect
 import functools
 
+import retry
+from query_helpers import fetch_all
+
 
 def with_db_connection(func):
     with sqlite3.connect('users.db') as conn:
@@ -11,19 +14,28 @@ def with_db_connection(func):
         return wrapper
 
 
-def retry_on_failure(retries, delay):
+def retry_on_failure(retries, delay, backoff=2.0, max_delay=30.0, jitter=True, deadline=None,
+                     is_transient=retry.is_transient):
+    """Retries transient failures with exponential backoff and jitter.
+
+    Errors is_transient rejects are raised at once; deadline is a budget in
+    seconds for the whole call, attempts and pauses included, and a retry
+    that would overrun it is not made. Coroutine functions get an async
+    wrapper that awaits asyncio.sleep instead of blocking the event loop.
+    """
+    policy = dict(retries=retries, delay=delay, backoff=backoff, max_delay=max_delay, jitter=jitter,
+                  deadline=deadline, is_transient=is_transient)
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await retry.call_with_retry_async(func, args, kwargs, **policy)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            for attempt in range(retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt < retries - 1:
-                        print(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay} seconds...")
-                        time.sleep(delay)
-                    else:
-                        raise e
+            return retry.call_with_retry(func, args, kwargs, **policy)
         return wrapper
     return decorator
 
@@ -32,9 +44,7 @@ def retry_on_failure(retries, delay):
 @retry_on_failure(retries=3, delay=1)
 
 def fetch_users_with_retry(conn):
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    return cursor.fetchall()
+    return fetch_all(conn, "SELECT * FROM users")
 
 #### attempt to fetch users with automatic retry on failure
 
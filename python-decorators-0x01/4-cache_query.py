@@ -2,8 +2,8 @@ import time
 import sqlite3 
 import functools
 
+from query_cache import default_cache as query_cache, default_flight, make_key
 
-query_cache = {}
 
 def with_db_connection(func):
     with sqlite3.connect('users.db') as conn:
@@ -12,19 +12,35 @@ def with_db_connection(func):
             return func(conn, *args, **kwargs)
         return wrapper
     
-def cache_query(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query = kwargs.get('query', None)
-        if query in query_cache:
-            print("Using cached result for query:", query)
-            return query_cache[query]
-        else:
-            print("Executing query:", query)
-            result = func(*args, **kwargs)
-            query_cache[query] = result
-            return result
-    return wrapper
+def cache_query(func=None, *, ttl=None, cache=None):
+    """Caches results by query and params; use bare or as cache_query(ttl=...)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query = kwargs.get('query', None)
+            if query is None:
+                return func(*args, **kwargs)
+            store = cache or query_cache
+            key = make_key(query, kwargs.get('params', ()))
+            hit, result = store.get(key)
+            if hit:
+                print("Using cached result for query:", query)
+                return result
+            def load():
+                # A leader that finished between our miss and do() has filled the cache already
+                hit, result = store.get(key)
+                if hit:
+                    return result
+                print("Executing query:", query)
+                result = func(*args, **kwargs)
+                store.set(key, result, ttl)
+                return result
+            # Concurrent misses on the same key wait for one execution instead of stampeding
+            return default_flight.do((id(store), key), load)
+        return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @with_db_connection
 @cache_query
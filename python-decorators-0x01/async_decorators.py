@@ -0,0 +1,187 @@
+"""asyncio counterparts of the python-decorators-0x01 decorators.
+
+They stack in the same order as the sync ones:
+
+    @async_with_db_connection
+    @async_transactional
+    async def update_user_email(conn, user_id, new_email): ...
+
+    @async_with_db_connection
+    @async_retry_on_failure(retries=3, delay=1)
+    async def fetch_users_with_retry(conn): ...
+
+    @async_with_db_connection
+    @async_cache_query
+    async def fetch_users_with_cache(conn, query): ...
+"""
+import functools
+import inspect
+import sqlite3
+import time
+
+import aiosqlite
+
+import retry
+import sqlite_profile
+from query_cache import AsyncQueryCache, AsyncSingleFlight, default_cache, make_key
+from query_profiler import print_query
+
+async_cache = AsyncQueryCache(default_cache)
+async_flight = AsyncSingleFlight()
+
+
+def _require_coroutine(func, decorator):
+    if not inspect.iscoroutinefunction(func):
+        raise TypeError(f"{decorator} needs an async def function, got {func.__qualname__}")
+
+
+def _optional_args(decorator):
+    """Lets a keyword-configured decorator also be used bare"""
+    @functools.wraps(decorator)
+    def outer(func=None, **options):
+        if func is not None:
+            return decorator(func, **options)
+        return lambda func: decorator(func, **options)
+    return outer
+
+
+@_optional_args
+def async_log_queries(func, profiler=None):
+    _require_coroutine(func, 'async_log_queries')
+
+    if profiler is not None:
+        @functools.wraps(func)
+        async def profiled(*args, **kwargs):
+            start = time.perf_counter_ns()
+            result = error = None
+            try:
+                result = await func(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                profiler.record_call(args, kwargs, result, time.perf_counter_ns() - start, error)
+        return profiled
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        print_query(func, args, kwargs)
+        return await func(*args, **kwargs)
+    return wrapper
+
+
+@_optional_args
+def async_with_db_connection(func, database='users.db', profile=None):
+    """Opens an aiosqlite connection per call and passes it as the first argument"""
+    _require_coroutine(func, 'async_with_db_connection')
+    pragmas = sqlite_profile.pragmas_for(profile)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with aiosqlite.connect(database) as conn:
+            for pragma, value in pragmas.items():
+                await conn.execute(f"PRAGMA {pragma}={value}")
+            return await func(conn, *args, **kwargs)
+    return wrapper
+
+
+def async_transactional(func):
+    """Commit on success, rollback on error; nested scopes become SAVEPOINTs"""
+    _require_coroutine(func, 'async_transactional')
+
+    @functools.wraps(func)
+    async def wrapper(conn, *args, **kwargs):
+        depth = getattr(conn, '_transactional_depth', 0)
+        if depth:
+            savepoint = f"transactional_{depth}"
+            await conn.execute(f"SAVEPOINT {savepoint}")
+            conn._transactional_depth = depth + 1
+            try:
+                result = await func(conn, *args, **kwargs)
+            except Exception:
+                await conn.execute(f"ROLLBACK TO {savepoint}")
+                await conn.execute(f"RELEASE {savepoint}")
+                raise
+            finally:
+                conn._transactional_depth = depth
+            await conn.execute(f"RELEASE {savepoint}")
+            return result
+
+        written = set()
+
+        def track_writes(action, table, *_):
+            # Runs on aiosqlite's worker thread as statements are prepared
+            if action in (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE):
+                written.add(table)
+            return sqlite3.SQLITE_OK
+
+        await conn.set_authorizer(track_writes)
+        conn._transactional_depth = 1
+        try:
+            if not conn.in_transaction:
+                await conn.execute("BEGIN")
+            result = await func(conn, *args, **kwargs)
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            conn._transactional_depth = 0
+            await conn.set_authorizer(None)
+        await async_cache.invalidate_tables(written)
+        return result
+    return wrapper
+
+
+def async_retry_on_failure(retries, delay, backoff=2.0, max_delay=30.0, jitter=True, deadline=None,
+                           is_transient=retry.is_transient):
+    """retry_on_failure for coroutines: awaits asyncio.sleep between attempts"""
+    policy = dict(retries=retries, delay=delay, backoff=backoff, max_delay=max_delay, jitter=jitter,
+                  deadline=deadline, is_transient=is_transient)
+
+    def decorator(func):
+        _require_coroutine(func, 'async_retry_on_failure')
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await retry.call_with_retry_async(func, args, kwargs, **policy)
+        return wrapper
+    return decorator
+
+
+@_optional_args
+def async_cache_query(func, ttl=None, cache=None):
+    """cache_query for coroutines; concurrent misses for a key share one query.
+
+    cache is an AsyncQueryCache, or a sync cache to build one from; the
+    default follows query_cache.default_cache.
+    """
+    _require_coroutine(func, 'async_cache_query')
+    if cache is None:
+        store = async_cache
+    else:
+        store = cache if isinstance(cache, AsyncQueryCache) else AsyncQueryCache(cache)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        query = kwargs.get('query', None)
+        if query is None:
+            return await func(*args, **kwargs)
+        key = make_key(query, kwargs.get('params', ()))
+        hit, result = await store.get(key)
+        if hit:
+            print("Using cached result for query:", query)
+            return result
+
+        async def load():
+            # A leader that finished between our miss and do() has filled the cache already
+            hit, result = await store.get(key)
+            if hit:
+                return result
+            print("Executing query:", query)
+            result = await func(*args, **kwargs)
+            await store.set(key, result, ttl)
+            return result
+        return await async_flight.do((id(store), key), load)
+    return wrapper
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import sqlite_profile
+
+
+def make_users(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT UNIQUE, age INTEGER)")
+    conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                     ((f"user{i}", f"user{i}@example.com", 18 + i % 80) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def run(profile, readers, seconds, rows):
+    """One writer updating emails while `readers` threads scan; returns counts"""
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def reader():
+        conn = sqlite_profile.connect(path, profile)
+        done = locked = 0
+        while time.monotonic() < stop:
+            try:
+                conn.execute("SELECT COUNT(*), AVG(age) FROM users WHERE age > ?", (30,)).fetchone()
+                done += 1
+            except sqlite3.OperationalError:
+                locked += 1
+        conn.close()
+        with lock:
+            counts['reads'] += done
+            counts['locked'] += locked
+
+    def writer():
+        conn = sqlite_profile.connect(path, profile)
+        done = locked = 0
+        while time.monotonic() < stop:
+            try:
+                user_id = done % rows + 1
+                conn.execute("UPDATE users SET email = ? WHERE id = ?", (f"new{done}@example.com", user_id))
+                conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                locked += 1
+        conn.close()
+        with lock:
+            counts['writes'] += done
+            counts['locked'] += locked
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        make_users(path, rows)
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return counts
+
+
+def main(readers=4, seconds=3, rows=50_000):
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+    for profile in sqlite_profile.PROFILES:
+        counts = run(profile, readers, seconds, rows)
+        print(f"{profile:<12} {counts['reads'] / seconds:>10.0f} {counts['writes'] / seconds:>10.0f} "
+              f"{counts['locked']:>8}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,160 @@
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+
+import retry
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling through while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fails fast once too many recent calls have failed.
+
+    Closed: calls go through and their outcomes fill a rolling window of the
+    last `window` calls; once at least min_calls are recorded and the failure
+    rate reaches failure_threshold the circuit opens. Open: calls raise
+    CircuitOpenError until reset_timeout has passed. Half-open: up to
+    half_open_calls probes go through; one success closes the circuit, one
+    failure opens it again.
+
+    Stack it outside retry_on_failure so a whole retried call counts once
+    and an open circuit skips the retries:
+
+        @with_db_connection
+        @breaker
+        @retry_on_failure(retries=3, delay=1)
+        def fetch_users_with_retry(conn): ...
+    """
+
+    def __init__(self, failure_threshold=0.5, window=20, min_calls=10, reset_timeout=30.0,
+                 half_open_calls=1, is_failure=retry.is_transient, name=None):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure
+        self.name = name
+        self._outcomes = deque(maxlen=window)  # True for a failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._trial = 0  # Bumped on each move to half-open, so late probes can be told apart
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._trial += 1
+        return self._state
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.counters['opened'] += 1
+
+    def before_call(self):
+        """Admits or rejects a call; returns the token to pass to record()"""
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_calls):
+                self.counters['rejected'] += 1
+                raise CircuitOpenError(f"Circuit {self.name!r} is open" if self.name else "Circuit is open")
+            self.counters['calls'] += 1
+            if state == HALF_OPEN:
+                self._probes += 1
+                return self._trial  # This call is a probe of the current half-open trial
+            return None
+
+    def record(self, failed, probe=None):
+        """Records a call's outcome; probe is the token before_call returned for it.
+
+        Only a probe of the current half-open trial can close or re-open the
+        circuit; a call admitted while closed that finishes after the circuit
+        has moved on is counted but no longer feeds the window.
+        """
+        with self._lock:
+            if failed:
+                self.counters['failures'] += 1
+            if probe is not None:
+                if self._state == HALF_OPEN and probe == self._trial:
+                    self._probes -= 1
+                    if failed:
+                        self._open()
+                    else:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            if (len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) / len(self._outcomes) >= self.failure_threshold):
+                self._open()
+
+    def release(self, probe):
+        """For a call that ended without an outcome (cancelled, interrupted): frees its probe slot"""
+        with self._lock:
+            if probe is not None and self._state == HALF_OPEN and probe == self._trial:
+                self._probes -= 1
+
+    def metrics(self):
+        with self._lock:
+            outcomes = len(self._outcomes)
+            return dict(self.counters, name=self.name, state=self._current_state(),
+                        failure_rate=sum(self._outcomes) / outcomes if outcomes else 0.0)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                probe = self.before_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    self.record(self.is_failure(e), probe)
+                    raise
+                except BaseException:
+                    self.release(probe)  # e.g. CancelledError from wait_for
+                    raise
+                self.record(False, probe)
+                return result
+            async_wrapper.circuit_breaker = self
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            probe = self.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.record(self.is_failure(e), probe)
+                raise
+            except BaseException:
+                self.release(probe)
+                raise
+            self.record(False, probe)
+            return result
+        wrapper.circuit_breaker = self
+        return wrapper
+
+
+def circuit_breaker(func=None, **options):
+    """Decorator form: @circuit_breaker, or @circuit_breaker(reset_timeout=10, ...)"""
+    if func is not None:
+        return CircuitBreaker(**options)(func)
+    return CircuitBreaker(**options)
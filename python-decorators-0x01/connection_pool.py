@@ -0,0 +1,163 @@
+import functools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import sqlite_profile
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of sqlite3 connections handed out one thread at a time.
+
+    A thread that already holds a connection gets the same one back on a
+    nested checkout, so stacked decorators share one handle. Idle
+    connections are health-checked before reuse and closed once they have
+    sat unused for longer than max_idle seconds. profile is applied to every
+    new connection (see sqlite_profile.PROFILES).
+    """
+
+    def __init__(self, database='users.db', max_size=8, max_idle=300.0, health_check_after=30.0,
+                 timeout=30.0, profile=None):
+        self.database = database
+        self.profile = profile
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle = []  # (conn, returned_at), most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self.stats = {'created': 0, 'reused': 0, 'evicted': 0, 'unhealthy': 0, 'waits': 0}
+
+    def _connect(self):
+        # Connections move between threads over their life, but only one holds each at a time
+        return sqlite_profile.connect(self.database, self.profile, check_same_thread=False)
+
+    def _healthy(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _evict_idle(self, now):
+        """Closes connections idle past max_idle; caller holds the lock"""
+        keep = []
+        for conn, returned_at in self._idle:
+            if now - returned_at > self.max_idle:
+                conn.close()
+                self._open -= 1
+                self.stats['evicted'] += 1
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+
+    def checkout(self):
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    if now - returned_at > self.health_check_after and not self._healthy(conn):
+                        conn.close()
+                        self._open -= 1
+                        self.stats['unhealthy'] += 1
+                        continue
+                    self.stats['reused'] += 1
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._open -= 1
+                        raise
+                    self.stats['created'] += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeout(f"No connection available after {self.timeout}s")
+                self.stats['waits'] += 1
+                self._cond.wait(remaining)
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def checkin(self, conn, discard=False):
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.depth -= 1
+            if self._local.depth:
+                return
+            self._local.conn = None
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()  # Never hand the next caller someone else's open transaction
+            except sqlite3.Error:
+                discard = True
+        with self._cond:
+            if discard:
+                conn.close()
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle = []
+
+    def size(self):
+        with self._cond:
+            return {'open': self._open, 'idle': len(self._idle), 'max_size': self.max_size}
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool():
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+def with_pooled_connection(func=None, *, pool=None):
+    """Pooled with_db_connection: checks a connection out for each call.
+
+    Use bare (@with_pooled_connection) for the default users.db pool or
+    with pool=... to pick one.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with (pool or get_default_pool()).connection() as conn:
+                return func(conn, *args, **kwargs)
+        return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
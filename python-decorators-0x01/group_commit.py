@@ -0,0 +1,157 @@
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from query_cache import default_cache, track_writes
+
+_STOP = object()
+
+
+class GroupCommitter:
+    """Runs writes from many callers on one connection, one commit per group.
+
+    Submitted writes queue up for a writer thread, which opens a
+    transaction, runs up to max_batch of them (waiting at most max_delay
+    seconds for the group to fill) and commits once. Each write runs in its
+    own SAVEPOINT, so one failing write is rolled back alone. Futures
+    resolve only after the COMMIT returns, i.e. once the data is durable;
+    if the group itself fails, every future in it gets the error.
+    """
+
+    def __init__(self, database='users.db', max_batch=500, max_delay=0.005, cache=default_cache):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = cache
+        self._queue = queue.Queue()
+        self.stats = {'writes': 0, 'failed': 0, 'commits': 0}
+        self._error = None  # Set once the writer has stopped; later submits fail with it
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queues func(conn, *args, **kwargs); returns a Future for its result"""
+        future = Future()
+        with self._lock:
+            if self._error is None:
+                self._queue.put((future, func, args, kwargs))
+                return future
+        future.set_exception(self._error)
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # Finish this group, then stop
+                break
+            group.append(item)
+        return group
+
+    def _run(self):
+        conn = None
+        try:
+            # isolation_level=None: BEGIN/SAVEPOINT/COMMIT are issued explicitly below
+            conn = sqlite3.connect(self.database, isolation_level=None, check_same_thread=False)
+            while True:
+                group = self._collect()
+                if group is None:
+                    break
+                self._commit_group(conn, group)
+            self._stop(RuntimeError("GroupCommitter is closed"))
+        except BaseException as e:
+            self._stop(e)
+            raise
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _commit_group(self, conn, group):
+        done = []
+        try:
+            with track_writes(conn) as written:
+                conn.execute("BEGIN")
+                for future, func, args, kwargs in group:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT group_write")
+                    try:
+                        result = func(conn, *args, **kwargs)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO group_write")
+                        conn.execute("RELEASE group_write")
+                        future.set_exception(e)
+                        self.stats['failed'] += 1
+                        continue
+                    if not conn.in_transaction:
+                        raise sqlite3.ProgrammingError(
+                            f"{getattr(func, '__qualname__', func)} ended the group's transaction; "
+                            "writes must not commit or roll back themselves")
+                    conn.execute("RELEASE group_write")
+                    done.append((future, result))
+                conn.execute("COMMIT")
+        except BaseException as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            # Nothing in the group was committed: fail every future not already settled
+            for future, *_ in group:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        self.stats['commits'] += 1
+        self.stats['writes'] += len(done)
+        if self.cache is not None:
+            self.cache.invalidate_tables(written)
+        for future, result in done:
+            future.set_result(result)
+
+    def _stop(self, error):
+        """Fails everything still queued, and every later submit, with error"""
+        with self._lock:
+            self._error = error
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and not item[0].done():
+                item[0].set_exception(error)
+
+    def close(self):
+        """Flushes queued writes and stops the writer thread"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+
+def group_transactional(committer, wait=False):
+    """Like @transactional, but the write joins committer's next group commit.
+
+    The decorated function takes conn first, as with transactional, and is
+    called without it. The call returns a Future, or with wait=True blocks
+    until the commit and returns the result.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            future = committer.submit(func, *args, **kwargs)
+            return future.result() if wait else future
+        return wrapper
+    return decorator
@@ -0,0 +1,475 @@
+import asyncio
+import hashlib
+import marshal
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+CLAUSE_PATTERN = re.compile(r'\b(FROM|JOIN|INTO|UPDATE)\b', re.IGNORECASE)
+# [schema.]table [[AS] alias]; quotes allowed around either name
+TABLE_PATTERN = re.compile(r'\s*(?:["`\[]?\w+["`\]]?\s*\.\s*)?["`\[]?(\w+)["`\]]?(?:\s+(?:AS\s+)?\w+)?\s*',
+                           re.IGNORECASE)
+
+ALIAS_PATTERN = re.compile(r'(?:\s+(?:AS\s+)?\w+)?\s*', re.IGNORECASE)
+
+
+def _skip_parens(query, pos):
+    """Index just past the parenthesis that closes the one at pos"""
+    depth = 0
+    for index in range(pos, len(query)):
+        if query[index] == '(':
+            depth += 1
+        elif query[index] == ')':
+            depth -= 1
+            if not depth:
+                return index + 1
+    return len(query)
+
+
+def tables_in(query):
+    """Lower-cased table names a statement reads from or writes to.
+
+    Understands comma-separated FROM lists and schema-qualified names;
+    subqueries are picked up through their own FROM. Over-matching (say, a
+    keyword inside a string literal) only costs extra invalidations.
+    """
+    names = set()
+    for clause in CLAUSE_PATTERN.finditer(query):
+        pos = clause.end()
+        while True:
+            start = len(query) - len(query[pos:].lstrip())
+            if query.startswith('(', start):
+                pos = ALIAS_PATTERN.match(query, _skip_parens(query, start)).end()  # (subquery) [alias]
+            else:
+                table = TABLE_PATTERN.match(query, pos)
+                if table is None:
+                    break
+                names.add(table.group(1).lower())
+                pos = table.end()
+            if clause.group(1).upper() != 'FROM' or not query.startswith(',', pos):
+                break
+            pos += 1
+    return frozenset(names)
+
+
+@contextmanager
+def track_writes(conn):
+    """Collects the tables written through conn while the block runs.
+
+    Uses the SQLite authorizer, which sees every INSERT/UPDATE/DELETE as it
+    is prepared; installing it expires cached statements, so repeated SQL
+    is seen too.
+    """
+    written = set()
+
+    def authorizer(action, table, *_):
+        if action in (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE):
+            written.add(table)
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        yield written
+    finally:
+        conn.set_authorizer(None)
+
+
+def make_key(query, params=()):
+    if isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    return (query, tuple(params or ()))
+
+
+def estimate_size(value):
+    """Rough byte size of a result set (list of row tuples)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(item) for item in row)
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results keyed by SQL plus bind parameters.
+
+    Bounded by entry count and estimated bytes, with a per-entry TTL, and
+    indexed by table so a write can drop every result that read the table.
+    Pass lock=nullcontext() for a cache only ever touched from one thread.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300.0, lock=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at, tables)
+        self._by_table = {}
+        self._bytes = 0
+        self._lock = lock or threading.Lock()
+        self._listeners = []
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _remove(self, key):
+        value, size, expires_at, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get(self, key):
+        """Returns (hit, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return False, None
+            if entry[2] < time.monotonic():
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, entry[0]
+
+    def set(self, key, value, ttl=None):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        tables = tables_in(key[0])
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def invalidate_tables(self, tables):
+        """Drops every cached result that read any of the given tables"""
+        tables = list(tables)
+        with self._lock:
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    self._remove(key)
+                    self.stats['invalidations'] += 1
+        for listener in self._listeners:
+            listener(tables)
+
+    def on_invalidate(self, listener):
+        """Calls listener(tables) after every invalidate_tables, from the invalidating thread"""
+        self._listeners.append(listener)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+
+
+class SqliteCacheBackend:
+    """Host-wide cache shared by every worker process through one SQLite file.
+
+    Rows are stored with marshal (compact, and limited to plain values, so
+    loading a shared file can't run code), zlib-compressed when large.
+    Results marshal can't encode are simply not shared.
+    """
+
+    COMPRESS_OVER = 1024
+
+    def __init__(self, path, ttl=300.0, max_entries=100_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._sets = 0
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'corrupt': 0}
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS query_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, tables TEXT NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers in other processes don't block writers
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _encode(self, value):
+        data = marshal.dumps(value)
+        if len(data) > self.COMPRESS_OVER:
+            return b'z' + zlib.compress(data)
+        return b'm' + data
+
+    @staticmethod
+    def _decode(blob):
+        data = blob[1:]
+        return marshal.loads(zlib.decompress(data) if blob[:1] == b'z' else data)
+
+    def get(self, key):
+        digest = self._digest(key)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at FROM query_cache WHERE key = ? AND expires_at > ?",
+            (digest, time.time())
+        ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return False, None
+        try:
+            value = self._decode(row[0])
+        except (ValueError, EOFError, TypeError, zlib.error):
+            # Truncated, or written by a Python whose marshal format differs: drop it
+            conn.execute("DELETE FROM query_cache WHERE key = ?", (digest,))
+            self.stats['misses'] += 1
+            self.stats['corrupt'] += 1
+            return False, None
+        self.stats['hits'] += 1
+        return True, value
+
+    def remaining_ttl(self, key):
+        row = self._conn().execute("SELECT expires_at FROM query_cache WHERE key = ?",
+                                   (self._digest(key),)).fetchone()
+        return max(row[0] - time.time(), 0.0) if row else 0.0
+
+    def set(self, key, value, ttl=None):
+        try:
+            blob = self._encode(value)
+        except ValueError:
+            return
+        tables = ''.join(f",{table}" for table in sorted(tables_in(key[0]))) + ','
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?)",
+                     (self._digest(key), blob, expires_at, tables))
+        self._sets += 1
+        if self._sets % 256 == 0:
+            self._prune(conn)
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM query_cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM query_cache WHERE key IN ("
+            "SELECT key FROM query_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def invalidate_tables(self, tables):
+        conn = self._conn()
+        for table in tables:
+            cursor = conn.execute("DELETE FROM query_cache WHERE tables LIKE ?", (f"%,{table.lower()},%",))
+            self.stats['invalidations'] += cursor.rowcount
+
+    def clear(self):
+        self._conn().execute("DELETE FROM query_cache")
+
+    def info(self):
+        count = self._conn().execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        return dict(self.stats, entries=count)
+
+
+class TieredCache:
+    """In-process QueryCache in front of a shared backend.
+
+    The first level only holds entries for l1_ttl seconds, which bounds how
+    long a worker can miss an invalidation made by another process.
+    """
+
+    def __init__(self, shared, local=None, l1_ttl=5.0):
+        self.shared = shared
+        self.local = local or QueryCache(ttl=l1_ttl)
+        self.l1_ttl = l1_ttl
+
+    def get(self, key):
+        hit, value = self.local.get(key)
+        if hit:
+            return hit, value
+        hit, value = self.shared.get(key)
+        if hit:
+            self.local.set(key, value, min(self.l1_ttl, self.shared.remaining_ttl(key)))
+        return hit, value
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, self.l1_ttl if ttl is None else min(ttl, self.l1_ttl))
+        self.shared.set(key, value, ttl)
+
+    def invalidate_tables(self, tables):
+        tables = list(tables)
+        self.local.invalidate_tables(tables)
+        self.shared.invalidate_tables(tables)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def info(self):
+        return {'local': self.local.info(), 'shared': self.shared.info()}
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first thread to ask for a key runs fn; threads arriving while it
+    is in flight wait and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight; fn returns an awaitable"""
+
+    def __init__(self):
+        self._calls = {}
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(future)
+        self.stats['executed'] += 1
+        future = self._calls[key] = asyncio.ensure_future(fn())
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+
+class AsyncQueryCache:
+    """Query cache for coroutines running on one event loop.
+
+    Results live in an in-process QueryCache of its own, guarded by an
+    asyncio.Lock instead of a thread lock, so a coroutine never blocks the
+    loop waiting on another thread. Built from a TieredCache, the shared
+    backend is used as well, with its blocking SQLite calls run in
+    asyncio.to_thread. Invalidations made through the sync cache it was
+    built from (e.g. by @transactional) are forwarded to the loop.
+    """
+
+    def __init__(self, cache):
+        self.source = cache
+        if isinstance(cache, TieredCache):
+            self.shared, follow, ttl = cache.shared, cache.local, cache.l1_ttl
+        else:
+            self.shared, follow, ttl = None, cache, cache.ttl
+        self.local = QueryCache(follow.max_entries, follow.max_bytes, ttl, lock=nullcontext())
+        self._lock = asyncio.Lock()
+        self._loop = None
+        follow.on_invalidate(self._invalidated)
+
+    def _invalidated(self, tables):
+        if self._loop is None:
+            return  # Never used, so nothing cached yet
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self.local.invalidate_tables(tables)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.local.invalidate_tables, tables)
+
+    def _shared_get(self, key):
+        hit, value = self.shared.get(key)
+        return hit, value, self.shared.remaining_ttl(key) if hit else 0.0
+
+    async def get(self, key):
+        """Returns (hit, value)"""
+        self._loop = asyncio.get_running_loop()
+        async with self._lock:
+            hit, value = self.local.get(key)
+        if hit or self.shared is None:
+            return hit, value
+        hit, value, remaining = await asyncio.to_thread(self._shared_get, key)
+        if hit:
+            async with self._lock:
+                self.local.set(key, value, min(self.local.ttl, remaining))
+        return hit, value
+
+    async def set(self, key, value, ttl=None):
+        self._loop = asyncio.get_running_loop()
+        local_ttl = ttl if self.shared is None or ttl is None else min(ttl, self.local.ttl)
+        async with self._lock:
+            self.local.set(key, value, local_ttl)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, key, value, ttl)
+
+    async def invalidate_tables(self, tables):
+        """Drops results for tables here and, off the loop, in the sync cache and shared backend"""
+        tables = list(tables)
+        async with self._lock:
+            self.local.invalidate_tables(tables)
+        await asyncio.to_thread(self.source.invalidate_tables, tables)
+
+    def info(self):
+        return self.local.info()
+
+
+# Set QUERY_CACHE_SHARED_PATH to share results between worker processes on this host
+if os.environ.get('QUERY_CACHE_SHARED_PATH'):
+    default_cache = TieredCache(SqliteCacheBackend(os.environ['QUERY_CACHE_SHARED_PATH']))
+else:
+    default_cache = QueryCache()
+default_flight = SingleFlight()
@@ -0,0 +1,58 @@
+import itertools
+
+# sqlite3 keeps an LRU of prepared statements per connection, keyed by SQL
+# text. Connections opened by with_db_connection and ConnectionPool size it
+# with this, and the helpers below always bind parameters rather than
+# formatting values into the SQL, so repeated queries reuse their prepared
+# statement. The exception is @transactional: query_cache.track_writes sets
+# the SQLite authorizer on the way in and clears it on the way out, and each
+# change expires every prepared statement on that connection, so statements
+# are prepared again after each transactional call. That is deliberate: the
+# authorizer only sees statements as they are prepared, so a write reusing a
+# cached statement would otherwise not be tracked.
+STATEMENT_CACHE_SIZE = 512
+
+
+def fetch_one(conn, query, params=()):
+    return conn.execute(query, params).fetchone()
+
+
+def fetch_all(conn, query, params=()):
+    return conn.execute(query, params).fetchall()
+
+
+def iter_rows(conn, query, params=(), batch_size=500):
+    """Generator over the result rows, fetching batch_size at a time"""
+    cursor = conn.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def fetch(conn, query, params=(), stream=False, batch_size=500):
+    """Full list by default; stream=True returns an iterator instead"""
+    if stream:
+        return iter_rows(conn, query, params, batch_size)
+    return fetch_all(conn, query, params)
+
+
+def execute_many(conn, query, rows, batch_size=1000):
+    """Runs query once per parameter tuple in rows, batch_size per executemany.
+
+    rows may be any iterable (a generator is fine), so large updates never
+    sit in memory at once. Returns the total number of rows changed. The
+    caller (e.g. @transactional) owns commit and rollback.
+    """
+    rows = iter(rows)
+    changed = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        changed += conn.executemany(query, batch).rowcount
+    return changed
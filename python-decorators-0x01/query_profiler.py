@@ -0,0 +1,96 @@
+import atexit
+import hashlib
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+def fingerprint(params):
+    """Short stable hash of the bind parameters, so values never reach the log"""
+    if not params:
+        return None
+    return hashlib.blake2b(repr(params).encode(), digest_size=6).hexdigest()
+
+
+def query_of(args, kwargs):
+    """The SQL a log_queries-style call runs: its first argument or query="""
+    return args[0] if args else kwargs.get('query', '')
+
+
+def print_query(func, args, kwargs):
+    """log_queries' plain output: the query and the function's docstring, timestamped"""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"Executing query: {query_of(args, kwargs)}")
+    print(f"[{timestamp}] Executing function: {func.__doc__}")
+
+
+class QueryProfiler:
+    """Samples query timings into a ring buffer drained to a JSON-lines file.
+
+    Recording is a deque.append, which is atomic under the GIL, so callers
+    never take a lock; when the buffer is full the oldest records are
+    dropped rather than blocking. A daemon thread writes the buffer out
+    every flush_interval seconds. One in sample_every calls is kept, plus
+    every call slower than slow_ms; sample_every=0 (or None) keeps only the
+    slow ones. Calls that raise are recorded too, with their error.
+    """
+
+    def __init__(self, sink_path, sample_every=1, slow_ms=None, capacity=10000, flush_interval=1.0):
+        self.sink_path = sink_path
+        self.sample_every = sample_every
+        self.slow_ms = slow_ms
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=capacity)
+        self._calls = itertools.count()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='query-profiler', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, query, params, elapsed_ns, rows, depth=2, error=None):
+        """Keeps the call if it is sampled or slow; depth locates the caller's frame"""
+        elapsed_ms = elapsed_ns / 1e6
+        slow = self.slow_ms is not None and elapsed_ms >= self.slow_ms
+        if not slow and (not self.sample_every or next(self._calls) % self.sample_every):
+            return
+        frame = sys._getframe(depth)
+        self._buffer.append({
+            'ts': time.time(),
+            'query': query,
+            'params': fingerprint(params),
+            'ms': round(elapsed_ms, 3),
+            'rows': rows,
+            'caller': f"{frame.f_code.co_filename}:{frame.f_lineno}:{frame.f_code.co_name}",
+            'slow': slow,
+            'error': None if error is None else f"{type(error).__name__}: {error}",
+        })
+
+    def record_call(self, args, kwargs, result, elapsed_ns, error=None):
+        """record() for a decorated call's arguments and result, or the error it raised"""
+        rows = len(result) if isinstance(result, (list, tuple)) else None
+        self.record(query_of(args, kwargs), kwargs.get('params'), elapsed_ns, rows, depth=3, error=error)
+
+    def flush(self):
+        with self._flush_lock:
+            lines = []
+            while True:
+                try:
+                    lines.append(json.dumps(self._buffer.popleft(), default=str))
+                except IndexError:
+                    break
+            if lines:
+                with open(self.sink_path, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
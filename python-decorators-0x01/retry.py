@@ -0,0 +1,88 @@
+import asyncio
+import itertools
+import random
+import sqlite3
+import time
+
+# sqlite3.OperationalError messages worth retrying; anything else (syntax
+# errors, missing tables, ...) will fail the same way every time
+SQLITE_TRANSIENT = ('database is locked', 'database table is locked', 'database is busy',
+                    'unable to open database', 'disk i/o error')
+# MySQL: lock wait timeout, deadlock, can't connect, server gone away, lost connection
+MYSQL_TRANSIENT = {1205, 1213, 2003, 2006, 2013}
+
+
+def is_transient(exc):
+    """Default classifier: True if retrying exc has a chance of succeeding"""
+    if isinstance(exc, sqlite3.OperationalError):
+        message = str(exc).lower()
+        return any(text in message for text in SQLITE_TRANSIENT)
+    if isinstance(exc, sqlite3.Error):
+        return False
+    if getattr(exc, 'errno', None) in MYSQL_TRANSIENT:
+        return True
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def backoff_delays(retries, delay, backoff=2.0, max_delay=30.0, jitter=True):
+    """Yields the pause before each of the retries - 1 retries.
+
+    Pauses grow as delay * backoff ** attempt, capped at max_delay; with
+    jitter each is drawn uniformly from [0, pause] ("full jitter") so
+    clients that failed together don't retry together.
+    """
+    for attempt in range(retries - 1):
+        pause = min(max_delay, delay * backoff ** attempt)
+        if jitter:
+            pause = random.uniform(0, pause)
+        yield pause
+
+
+def _next_pause(exc, delays, is_transient, stop_at, last_attempt):
+    """Pause before retrying after exc, or None to give up"""
+    if not is_transient(exc):
+        return None
+    pause = next(delays, None)
+    # Retry only if the pause plus another attempt as long as the last one fits the budget
+    if pause is not None and stop_at is not None and time.monotonic() + pause + last_attempt > stop_at:
+        return None
+    return pause
+
+
+def call_with_retry(func, args, kwargs, retries, delay, backoff=2.0, max_delay=30.0, jitter=True,
+                    deadline=None, is_transient=is_transient):
+    """Calls func(*args, **kwargs), retrying transient errors after the backoff_delays pauses.
+
+    deadline is a budget in seconds for the whole call, attempts and pauses
+    included, counted from the first attempt. A retry that would overrun it
+    is not made; an attempt already running is not interrupted.
+    """
+    stop_at = None if deadline is None else time.monotonic() + deadline
+    delays = backoff_delays(retries, delay, backoff, max_delay, jitter)
+    for attempt in itertools.count(1):
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            pause = _next_pause(e, delays, is_transient, stop_at, time.monotonic() - started)
+            if pause is None:
+                raise
+            print(f"Attempt {attempt} failed: {e}. Retrying in {pause:.2f} seconds...")
+            time.sleep(pause)
+
+
+async def call_with_retry_async(func, args, kwargs, retries, delay, backoff=2.0, max_delay=30.0,
+                                jitter=True, deadline=None, is_transient=is_transient):
+    """call_with_retry for a coroutine function: awaits asyncio.sleep between attempts"""
+    stop_at = None if deadline is None else time.monotonic() + deadline
+    delays = backoff_delays(retries, delay, backoff, max_delay, jitter)
+    for attempt in itertools.count(1):
+        started = time.monotonic()
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            pause = _next_pause(e, delays, is_transient, stop_at, time.monotonic() - started)
+            if pause is None:
+                raise
+            print(f"Attempt {attempt} failed: {e}. Retrying in {pause:.2f} seconds...")
+            await asyncio.sleep(pause)
@@ -0,0 +1,38 @@
+import sqlite3
+
+from query_helpers import STATEMENT_CACHE_SIZE
+
+# PRAGMA settings applied to each new connection. 'performance' trades the
+# default rollback journal for WAL, so readers no longer block the writer.
+PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # Safe with WAL: a crash can lose the last commits, not corrupt the file
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # Negative means KiB: 64 MiB of page cache
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # ms to wait on a lock before raising "database is locked"
+    },
+}
+
+
+def pragmas_for(profile):
+    """{pragma: value} for a PROFILES name or a dict; None means no pragmas"""
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {sorted(PROFILES)} or a dict")
+        return PROFILES[profile]
+    return dict(profile or {})
+
+
+def apply_profile(conn, profile):
+    """Applies a profile name from PROFILES, or a {pragma: value} dict, to conn"""
+    for pragma, value in pragmas_for(profile).items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+    return conn
+
+
+def connect(database, profile=None, **kwargs):
+    kwargs.setdefault('cached_statements', STATEMENT_CACHE_SIZE)
+    return apply_profile(sqlite3.connect(database, **kwargs), profile)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+""" Module for testing circuit_breaker """
+
+import asyncio
+import time
+import unittest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Transient(ConnectionError):
+    """Failure the default classifier counts against the circuit"""
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """ Testing Class CircuitBreaker """
+
+    def setUp(self):
+        """Breaker that opens after two failures and half-opens quickly"""
+        self.breaker = CircuitBreaker(window=4, min_calls=2, reset_timeout=0.05)
+
+        @self.breaker
+        def call(fail=False):
+            if fail:
+                raise Transient("down")
+            return 'ok'
+        self.call = call
+
+    def trip(self):
+        """Opens the circuit with two failed calls"""
+        for _ in range(2):
+            with self.assertRaises(Transient):
+                self.call(fail=True)
+
+    def test_opens_after_failure_threshold(self):
+        """ Failures past the threshold open it and later calls are rejected """
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.trip()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.call()
+        self.assertEqual(self.breaker.metrics()['rejected'], 1)
+
+    def test_non_transient_errors_do_not_count(self):
+        """ Errors is_failure rejects pass through without opening it """
+        @self.breaker
+        def broken():
+            raise KeyError('bug')
+        for _ in range(4):
+            with self.assertRaises(KeyError):
+                broken()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_probe_success_closes(self):
+        """ After reset_timeout one probe goes through and closes it """
+        self.trip()
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertEqual(self.call(), 'ok')
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_probe_failure_reopens(self):
+        """ A failing probe opens the circuit again """
+        self.trip()
+        time.sleep(0.06)
+        with self.assertRaises(Transient):
+            self.call(fail=True)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_only_one_probe_at_a_time(self):
+        """ While a probe is in flight further calls are rejected """
+        self.trip()
+        time.sleep(0.06)
+        probe = self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record(False, probe)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_late_call_does_not_act_as_probe(self):
+        """ A call admitted while closed can't close a half-open circuit """
+        slow = self.breaker.before_call()
+        self.trip()
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.record(False, slow)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_cancelled_probe_frees_its_slot(self):
+        """ A probe cancelled by wait_for doesn't wedge the breaker """
+        @self.breaker
+        async def query(delay):
+            await asyncio.sleep(delay)
+            return 'ok'
+
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(query(1), 0.01)
+            self.assertEqual(self.breaker.state, HALF_OPEN)
+            return await query(0)
+
+        self.trip()
+        time.sleep(0.06)
+        self.assertEqual(asyncio.run(scenario()), 'ok')
+        self.assertEqual(self.breaker.state, CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+""" Module for testing connection_pool """
+
+import os
+import tempfile
+import threading
+import unittest
+
+from connection_pool import ConnectionPool, PoolTimeout
+
+
+class TestConnectionPool(unittest.TestCase):
+    """ Testing Class ConnectionPool """
+
+    def setUp(self):
+        """Pool over a scratch database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, 'test.db')
+        self.pool = ConnectionPool(self.database, max_size=2, timeout=0.2)
+        with self.pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x)")
+            conn.commit()
+
+    def tearDown(self):
+        """Closes idle connections and removes the database"""
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_nested_checkout_reuses_connection(self):
+        """ A thread gets its own connection back on a nested checkout """
+        with self.pool.connection() as outer:
+            with self.pool.connection() as inner:
+                self.assertIs(inner, outer)
+            self.assertEqual(self.pool.size()['idle'], 0)
+        self.assertEqual(self.pool.size()['idle'], 1)
+
+    def test_threads_get_distinct_connections(self):
+        """ Concurrent threads never share a connection """
+        held, barrier = [], threading.Barrier(2)
+
+        def work():
+            with self.pool.connection() as conn:
+                held.append(conn)
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=work) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(held), 2)
+        self.assertIsNot(held[0], held[1])
+        self.assertEqual(self.pool.size()['open'], 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """ PoolTimeout once max_size connections are all held """
+        release, errors = threading.Event(), []
+
+        def hold():
+            with self.pool.connection():
+                release.wait(timeout=5)
+
+        holders = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in holders:
+            thread.start()
+        while self.pool.size()['open'] < 2:
+            pass
+
+        def waiter():
+            try:
+                self.pool.checkout()
+            except PoolTimeout as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        thread.join()
+        release.set()
+        for thread in holders:
+            thread.join()
+        self.assertEqual(len(errors), 1)
+
+    def test_waiter_gets_released_connection(self):
+        """ A waiting thread is handed the connection another checks in """
+        self.pool.max_size, self.pool.timeout = 1, 5
+        conn = self.pool.checkout()
+        got = []
+        thread = threading.Thread(target=lambda: got.append(self.pool.checkout()))
+        thread.start()
+        while not self.pool.stats['waits']:
+            thread.join(0.001)
+        self.pool.checkin(conn)
+        thread.join()
+        self.assertIs(got[0], conn)
+
+    def test_checkin_rolls_back_open_transaction(self):
+        """ Uncommitted work is not handed to the next caller """
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            self.assertTrue(conn.in_transaction)
+        with self.pool.connection() as conn:
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+""" Module for testing group_commit """
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from group_commit import GroupCommitter, group_transactional
+
+
+def insert(conn, value):
+    """Write that inserts one row and returns its value"""
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    return value
+
+
+def insert_then_fail(conn, value):
+    """Write that inserts a row and then raises"""
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    raise ValueError("bad write")
+
+
+def commit_itself(conn, value):
+    """Write that wrongly ends the group's transaction"""
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.execute("COMMIT")
+
+
+class TestGroupCommitter(unittest.TestCase):
+    """ Testing Class GroupCommitter """
+
+    def setUp(self):
+        """Fresh database and committer per test"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, 'test.db')
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE t (x)")
+        conn.commit()
+        conn.close()
+        # A long max_delay puts everything submitted below into one group
+        self.committer = GroupCommitter(self.database, max_delay=0.2, cache=None)
+
+    def tearDown(self):
+        """Stops the writer and removes the database"""
+        self.committer.close()
+        self.tmp.cleanup()
+
+    def rows(self):
+        """Values committed to t, read over a separate connection"""
+        conn = sqlite3.connect(self.database)
+        try:
+            return sorted(x for x, in conn.execute("SELECT x FROM t"))
+        finally:
+            conn.close()
+
+    def test_futures_resolve_after_commit(self):
+        """ Every future resolves to its result once the group is durable """
+        futures = [self.committer.submit(insert, i) for i in range(5)]
+        self.assertEqual([f.result(timeout=5) for f in futures], list(range(5)))
+        self.assertEqual(self.rows(), list(range(5)))
+        self.assertEqual(self.committer.stats['commits'], 1)
+
+    def test_failing_write_is_rolled_back_alone(self):
+        """ A failing write's savepoint is undone; the rest commit """
+        ok = self.committer.submit(insert, 1)
+        bad = self.committer.submit(insert_then_fail, 2)
+        later = self.committer.submit(insert, 3)
+        self.assertEqual(ok.result(timeout=5), 1)
+        self.assertEqual(later.result(timeout=5), 3)
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        self.assertEqual(self.rows(), [1, 3])
+
+    def test_group_failure_fails_every_future(self):
+        """ A write ending the transaction fails the whole group """
+        futures = [self.committer.submit(insert, 1),
+                   self.committer.submit(commit_itself, 2),
+                   self.committer.submit(insert, 3)]
+        for future in futures:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                future.result(timeout=5)
+        # The writer survives and keeps committing
+        self.assertEqual(self.committer.submit(insert, 4).result(timeout=5), 4)
+
+    def test_submit_after_close_fails(self):
+        """ Writes submitted after close fail instead of hanging """
+        self.committer.close()
+        with self.assertRaises(RuntimeError):
+            self.committer.submit(insert, 1).result(timeout=5)
+
+    def test_group_transactional_wait(self):
+        """ group_transactional(wait=True) returns the committed result """
+        @group_transactional(self.committer, wait=True)
+        def add(conn, value):
+            return insert(conn, value)
+        self.assertEqual(add(7), 7)
+        self.assertEqual(self.rows(), [7])
+
+
+if __name__ == '__main__':
+    unittest.main()
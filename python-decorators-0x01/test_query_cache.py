@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+""" Module for testing query_cache """
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from query_cache import (QueryCache, SingleFlight, SqliteCacheBackend, TieredCache,
+                         make_key, tables_in, track_writes)
+
+
+class TestTablesIn(unittest.TestCase):
+    """ Testing tables_in """
+
+    def test_tables_in(self):
+        """ Every table read or written is found """
+        cases = [
+            ("SELECT * FROM users", {'users'}),
+            ("SELECT * FROM users u, orders o WHERE u.id = o.user_id", {'users', 'orders'}),
+            ("SELECT * FROM main.users", {'users'}),
+            ('SELECT * FROM "Users" AS u JOIN main.orders o ON 1', {'users', 'orders'}),
+            ("SELECT * FROM (SELECT * FROM logs) s, users", {'logs', 'users'}),
+            ("SELECT * FROM users WHERE id IN (SELECT user_id FROM orders)", {'users', 'orders'}),
+            ("INSERT INTO users (name) VALUES (?)", {'users'}),
+            ("UPDATE main.users SET name = ?", {'users'}),
+            ("DELETE FROM users WHERE id = ?", {'users'}),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(tables_in(query), expected)
+
+
+class TestQueryCache(unittest.TestCase):
+    """ Testing Class QueryCache """
+
+    def test_invalidate_tables(self):
+        """ A write to a table drops every result that read it """
+        cache = QueryCache()
+        joined = make_key("SELECT * FROM users u, orders o")
+        other = make_key("SELECT * FROM products")
+        cache.set(joined, [(1,)])
+        cache.set(other, [(2,)])
+        cache.invalidate_tables({'orders'})
+        self.assertEqual(cache.get(joined), (False, None))
+        self.assertEqual(cache.get(other), (True, [(2,)]))
+
+    def test_ttl_expiry(self):
+        """ Entries past their TTL are misses """
+        cache = QueryCache()
+        key = make_key("SELECT * FROM users")
+        cache.set(key, [], ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.get(key), (False, None))
+
+    def test_lru_eviction(self):
+        """ The least recently used entry goes first """
+        cache = QueryCache(max_entries=2)
+        a, b, c = (make_key(f"SELECT {i} FROM t") for i in range(3))
+        cache.set(a, 1)
+        cache.set(b, 2)
+        cache.get(a)
+        cache.set(c, 3)
+        self.assertEqual(cache.get(b), (False, None))
+        self.assertEqual(cache.get(a), (True, 1))
+
+    def test_invalidation_listener(self):
+        """ on_invalidate listeners hear about every invalidation """
+        cache, heard = QueryCache(), []
+        cache.on_invalidate(heard.append)
+        cache.invalidate_tables(['users'])
+        self.assertEqual(heard, [['users']])
+
+
+class TestTrackWrites(unittest.TestCase):
+    """ Testing track_writes """
+
+    def test_repeated_statement_is_tracked(self):
+        """ A write reusing a cached statement is still seen """
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE users (name)")
+        for _ in range(2):
+            with track_writes(conn) as written:
+                conn.execute("INSERT INTO users VALUES (?)", ('a',))
+            self.assertEqual(written, {'users'})
+        conn.close()
+
+
+class TestSharedCache(unittest.TestCase):
+    """ Testing Classes SqliteCacheBackend and TieredCache """
+
+    def setUp(self):
+        """Shared cache file in a scratch directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = SqliteCacheBackend(os.path.join(self.tmp.name, 'cache.db'))
+
+    def tearDown(self):
+        """Removes the cache file"""
+        self.tmp.cleanup()
+
+    def test_round_trip_and_invalidation(self):
+        """ Values survive the shared file and writes invalidate them """
+        cache = TieredCache(self.backend)
+        key = make_key("SELECT * FROM users", (1,))
+        cache.set(key, [(1, 'a' * 2000)])
+        cache.local.clear()
+        self.assertEqual(cache.get(key), (True, [(1, 'a' * 2000)]))
+        cache.invalidate_tables(['users'])
+        self.assertEqual(cache.get(key), (False, None))
+
+    def test_corrupt_row_is_a_miss(self):
+        """ An undecodable row is dropped instead of failing the query """
+        key = make_key("SELECT * FROM users")
+        self.backend.set(key, [1])
+        self.backend._conn().execute("UPDATE query_cache SET value = ?", (b'm\xffjunk',))
+        self.assertEqual(self.backend.get(key), (False, None))
+        self.assertEqual(self.backend.info()['entries'], 0)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """ Testing Class SingleFlight """
+
+    def test_concurrent_calls_share_one_execution(self):
+        """ Callers arriving while a key is in flight reuse its result """
+        flight, calls, started = SingleFlight(), [], threading.Event()
+        release = threading.Event()
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return 'rows'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('k', load)))
+        leader.start()
+        started.wait(timeout=5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('k', load)))
+                     for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.stats['coalesced'] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+        self.assertEqual(results, ['rows'] * 4)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
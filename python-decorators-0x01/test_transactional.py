@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+""" Module for testing the nested scopes of 2-transactional """
+
+import importlib
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from query_cache import default_cache, make_key
+
+transactional = None
+_tmp = None
+_cwd = None
+
+
+def setUpModule():
+    """Imports 2-transactional from a scratch directory.
+
+    The module updates users.db in the working directory when imported, so
+    it gets a throwaway one.
+    """
+    global transactional, _tmp, _cwd
+    _tmp = tempfile.TemporaryDirectory()
+    _cwd = os.getcwd()
+    os.chdir(_tmp.name)
+    conn = sqlite3.connect('users.db')
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.execute("INSERT INTO users VALUES (1, 'a', 'a@example.com', 30)")
+    conn.commit()
+    conn.close()
+    transactional = importlib.import_module('2-transactional').transactional
+
+
+def tearDownModule():
+    """Restores the working directory"""
+    os.chdir(_cwd)
+    _tmp.cleanup()
+
+
+class TestTransactional(unittest.TestCase):
+    """ Testing transactional and its savepoints """
+
+    def setUp(self):
+        """In-memory table per test"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.commit()
+
+    def tearDown(self):
+        """Closes the connection"""
+        self.conn.close()
+
+    def names(self):
+        """Committed names, in insert order"""
+        return [name for name, in self.conn.execute("SELECT name FROM users ORDER BY id")]
+
+    def test_commit(self):
+        """ A successful scope commits """
+        @transactional
+        def add(conn, name):
+            conn.execute("INSERT INTO users (name) VALUES (?)", (name,))
+        add(self.conn, 'a')
+        self.assertFalse(self.conn.in_transaction)
+        self.assertEqual(self.names(), ['a'])
+
+    def test_inner_failure_rolls_back_only_inner(self):
+        """ A failing nested scope undoes its savepoint; the outer commits """
+        @transactional
+        def inner(conn):
+            conn.execute("INSERT INTO users (name) VALUES ('inner')")
+            raise ValueError("inner failed")
+
+        @transactional
+        def outer(conn):
+            conn.execute("INSERT INTO users (name) VALUES ('before')")
+            with self.assertRaises(ValueError):
+                inner(conn)
+            conn.execute("INSERT INTO users (name) VALUES ('after')")
+
+        outer(self.conn)
+        self.assertEqual(self.names(), ['before', 'after'])
+
+    def test_outer_failure_rolls_back_everything(self):
+        """ A failing outer scope undoes its released inner scopes too """
+        @transactional
+        def inner(conn):
+            conn.execute("INSERT INTO users (name) VALUES ('inner')")
+
+        @transactional
+        def outer(conn):
+            inner(conn)
+            raise ValueError("outer failed")
+
+        with self.assertRaises(ValueError):
+            outer(self.conn)
+        self.assertEqual(self.names(), [])
+
+    def test_three_levels(self):
+        """ Savepoints nest past one level """
+        @transactional
+        def level(conn, depth):
+            conn.execute("INSERT INTO users (name) VALUES (?)", (f"level{depth}",))
+            if depth < 3:
+                try:
+                    level(conn, depth + 1)
+                except ValueError:
+                    pass
+            elif depth == 3:
+                raise ValueError("deepest failed")
+
+        level(self.conn, 1)
+        self.assertEqual(self.names(), ['level1', 'level2'])
+
+    def test_write_invalidates_cached_reads(self):
+        """ Committed writes drop cached results for the written table """
+        key = make_key("SELECT * FROM main.users u, orders o")
+        default_cache.set(key, [('stale',)])
+
+        @transactional
+        def add(conn):
+            conn.execute("INSERT INTO users (name) VALUES ('b')")
+        add(self.conn)
+        self.assertEqual(default_cache.get(key), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
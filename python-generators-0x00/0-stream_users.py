@@ -1,13 +1,12 @@
-import sqlite3
+import streaming
 
-def stream_users():
-    conn = sqlite3.connect('user_data.db')
-    conn.row_factory = sqlite3.Row  # Enables accessing rows as dictionaries
-    cursor = conn.cursor()
+def stream_users(backend=None, row_format='dict'):
+    """Generator that yields users one by one from the sqlite or mysql store
 
-    cursor.execute("SELECT * FROM user_data")
-    for row in cursor:
-        yield dict(row)
-
-    cursor.close()
-    conn.close()
\ No newline at end of file
+    row_format is 'dict' (default), 'tuple' or 'record'; the last two skip
+    building a dict per row on large scans.
+    """
+    if row_format == 'columns':
+        raise ValueError("stream_users yields single rows; use stream_users_in_batches for columns")
+    for columns, rows in streaming.stream_batches("SELECT * FROM user_data", backend=backend):
+        yield from streaming.format_batch(columns, rows, row_format)
@@ -1,26 +1,36 @@
-import sqlite3
+import sys
 
-def stream_users_in_batches(batch_size):
-    """Generator that yields users in batches from the database"""
-    conn = sqlite3.connect('user_data.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM user_data")
+import streaming
 
-    while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        yield [dict(row) for row in rows]
+def stream_users_in_batches(batch_size, backend=None, row_format='dict', predicates=None, after_id=None):
+    """Generator that yields users in batches from the database
 
-    cursor.close()
-    conn.close()
+    row_format is one of streaming.ROW_FORMATS; 'columns' yields one
+    {column: values} mapping per batch instead of a list of rows.
+    predicates are pushed into the WHERE clause where possible (see
+    streaming.build_where) and checked in Python otherwise.
+    after_id switches to user_id order and starts just past that key,
+    which is how checkpoint.py resumes a scan.
+    """
+    where, params, residual = streaming.build_where(predicates, backend)
+    order = ''
+    if after_id is not None:
+        seek = f"user_id > {streaming.placeholder(backend)}"
+        where = f"{where} AND {seek}" if where else f" WHERE {seek}"
+        params += (after_id,)
+        order = " ORDER BY user_id"
+    keep = None
+    for columns, rows in streaming.stream_batches(f"SELECT * FROM user_data{where}{order}", params,
+                                                  batch_size=batch_size, backend=backend):
+        if residual:
+            keep = keep or streaming.residual_filter(columns, residual)
+            rows = [row for row in rows if keep(row)]
+            if not rows:
+                continue
+        yield streaming.format_batch(columns, rows, row_format)
 
-def batch_processing(batch_size):
-    """Processes batches to filter users over the age of 25"""
-    for batch in stream_users_in_batches(batch_size):
-        for user in batch:
-            if user['age'] > 25:
-                print(user)
-
-# "return"
+def batch_processing(batch_size, predicates=(('age', '>', 25),), backend=None, out=None):
+    """Processes batches to filter users (by default those over the age of 25)"""
+    out = out or sys.stdout
+    for batch in stream_users_in_batches(batch_size, backend=backend, predicates=predicates):
+        out.write(''.join(f"{user}\n" for user in batch))  # One write per batch, not per row
@@ -7,7 +7,17 @@ def paginate_users(page_size, offset):
     connection.close()
     return rows
 
-def lazy_pagination(page_size):
+def paginate_users_keyset(cursor, page_size, last_id):
+    """Fetches the page after last_id by seeking on the primary key"""
+    # One statement text for every page, so the prepared cursor only prepares once
+    cursor.execute(f"SELECT * FROM {seed.TABLE_NAME} WHERE user_id > ? ORDER BY user_id LIMIT ?", (last_id, page_size))
+    columns = cursor.column_names
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def lazy_pagination(page_size, keyset=False):
+    if keyset:
+        yield from lazy_pagination_keyset(page_size)
+        return
     offset = 0
     while True:
         page = paginate_users(page_size, offset)
@@ -15,3 +25,22 @@ def lazy_pagination(page_size):
             break
         yield page
         offset += page_size
+
+def lazy_pagination_keyset(page_size, after_id=None):
+    """Walks the table in user_id order over one connection and one prepared statement
+
+    after_id resumes the walk just past that key (see checkpoint.py).
+    """
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor(prepared=True)
+    last_id = after_id or ''  # '' sorts before every UUID
+    try:
+        while True:
+            page = paginate_users_keyset(cursor, page_size, last_id)
+            if not page:
+                break
+            yield page
+            last_id = page[-1]['user_id']
+    finally:
+        cursor.close()
+        connection.close()
@@ -1,23 +1,21 @@
-import sqlite3
+import stats
+import streaming
 
-def stream_user_ages():
+def stream_user_ages(backend=None):
     """Generator yielding ages one by one from the database"""
-    conn = sqlite3.connect('user_data.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT age FROM user_data")
-    for (age,) in cursor:
-        yield age
-    cursor.close()
-    conn.close()
+    for _, rows in streaming.stream_batches("SELECT age FROM user_data", backend=backend):
+        for (age,) in rows:
+            yield age
 
-def calculate_average_age():
-    total_age = 0
-    count = 0
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-    average = total_age / count if count else 0
+def calculate_average_age(pushdown=False, backend=None):
+    """Prints the mean age, via AVG() on the server or one streaming pass"""
+    if pushdown:
+        average = stats.aggregate_ages(backend)['avg'] or 0
+    else:
+        running, _ = stats.stream_age_stats(stream_user_ages(backend))
+        average = running.mean
     print(f"Average age of users: {average}")
+    return average
 
 if __name__ == "__main__":
     calculate_average_age()
@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+
+import aiosqlite
+
+import streaming
+
+
+async def async_connect(backend=None):
+    """Async counterpart of streaming.connect: aiosqlite or aiomysql"""
+    backend = backend or streaming.DEFAULT_BACKEND
+    if backend == 'sqlite':
+        return await aiosqlite.connect(streaming.SQLITE_PATH)
+    if backend == 'mysql':
+        import aiomysql
+        import seed
+        config = seed.DB_CONFIG
+        return await aiomysql.connect(host=config['host'], port=config['port'], user=config['user'],
+                                      password=config['password'], db=seed.DB_NAME)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+async def _open_cursor(conn, backend):
+    if backend == 'mysql':
+        import aiomysql
+        return await conn.cursor(aiomysql.SSCursor)  # Unbuffered, like streaming.stream_batches
+    return await conn.cursor()
+
+
+async def _close(conn, backend):
+    if backend == 'mysql':
+        conn.close()
+    else:
+        await conn.close()
+
+
+async def _drain(pending):
+    """Waits out a prefetch still running on the driver's thread before closing"""
+    if pending is not None:
+        with contextlib.suppress(Exception):
+            await pending
+
+
+async def async_stream_batches(query, params=(), batch_size=1000, backend=None):
+    """Async generator yielding (columns, rows); the next fetchmany runs while
+    the consumer is still working on the current batch."""
+    backend = backend or streaming.DEFAULT_BACKEND
+    conn = await async_connect(backend)
+    pending = None
+    try:
+        cursor = await _open_cursor(conn, backend)
+        await cursor.execute(query, params)
+        columns = tuple(col[0] for col in cursor.description)
+        pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+        while True:
+            rows = await pending
+            if not rows:
+                break
+            pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+            yield columns, list(rows)
+    finally:
+        await _drain(pending)
+        await _close(conn, backend)
+
+
+async def async_stream_users(backend=None, row_format='dict'):
+    """Async generator that yields users one by one.
+
+    Consumers that may stop early should wrap it in contextlib.aclosing so
+    the connection closes while the event loop is still running.
+    """
+    async with contextlib.aclosing(async_stream_batches("SELECT * FROM user_data", backend=backend)) as batches:
+        async for columns, rows in batches:
+            for row in streaming.format_batch(columns, rows, row_format):
+                yield row
+
+
+async def async_stream_users_in_batches(batch_size, backend=None, row_format='dict'):
+    """Async generator that yields users in batches"""
+    batches = async_stream_batches("SELECT * FROM user_data", batch_size=batch_size, backend=backend)
+    async with contextlib.aclosing(batches):
+        async for columns, rows in batches:
+            yield streaming.format_batch(columns, rows, row_format)
+
+
+async def _fetch_page(conn, backend, page_size, last_id):
+    mark = streaming.placeholder(backend)
+    cursor = await conn.cursor()
+    await cursor.execute(
+        f"SELECT * FROM user_data WHERE user_id > {mark} ORDER BY user_id LIMIT {mark}",
+        (last_id, page_size)
+    )
+    columns = tuple(col[0] for col in cursor.description)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return [dict(zip(columns, row)) for row in rows]
+
+
+async def async_lazy_pagination(page_size, backend=None):
+    """Async keyset pagination over one connection; the next page is
+    requested before the current one is handed to the consumer."""
+    backend = backend or streaming.DEFAULT_BACKEND
+    conn = await async_connect(backend)
+    pending = None
+    try:
+        pending = asyncio.ensure_future(_fetch_page(conn, backend, page_size, ''))
+        while True:
+            page = await pending
+            if not page:
+                break
+            pending = asyncio.ensure_future(_fetch_page(conn, backend, page_size, page[-1]['user_id']))
+            yield page
+    finally:
+        await _drain(pending)
+        await _close(conn, backend)
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import streaming
+
+batch_module = __import__('1-batch_processing')
+
+AGE_BINS = np.arange(0, 131, 10)
+
+
+def to_arrays(batch):
+    """Turns a 'columns' batch into NumPy arrays (age as int64, text as str)"""
+    arrays = {}
+    for column, values in batch.items():
+        if column == 'age':
+            arrays[column] = np.asarray(values, dtype=np.int64)
+        else:
+            arrays[column] = np.asarray(values, dtype=str)
+    return arrays
+
+
+def stream_arrays(batch_size=10000, backend=None, predicates=None):
+    """Generator yielding one dict of column arrays per fetched batch"""
+    for batch in batch_module.stream_users_in_batches(batch_size, backend=backend, row_format='columns',
+                                                      predicates=predicates):
+        yield to_arrays(batch)
+
+
+class BatchReport:
+    """Per-batch vectorized aggregates that merge into one final answer"""
+
+    def __init__(self, min_age=25, bins=AGE_BINS):
+        self.min_age = min_age
+        self.bins = np.asarray(bins)
+        self.rows = 0
+        self.over_min_age = 0
+        self.histogram = np.zeros(len(self.bins) - 1, dtype=np.int64)
+        self.domains = {}  # domain -> [count, age_sum]
+
+    def add(self, arrays):
+        ages = arrays['age']
+        self.rows += len(ages)
+        self.over_min_age += int(np.count_nonzero(ages > self.min_age))
+        self.histogram += np.histogram(ages, bins=self.bins)[0]
+        domains = np.char.partition(arrays['email'], '@')[:, 2]
+        keys, inverse = np.unique(domains, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(keys))
+        sums = np.bincount(inverse, weights=ages, minlength=len(keys))
+        for key, count, total in zip(keys.tolist(), counts.tolist(), sums.tolist()):
+            entry = self.domains.setdefault(key, [0, 0.0])
+            entry[0] += count
+            entry[1] += total
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.over_min_age += other.over_min_age
+        self.histogram += other.histogram
+        for key, (count, total) in other.domains.items():
+            entry = self.domains.setdefault(key, [0, 0.0])
+            entry[0] += count
+            entry[1] += total
+        return self
+
+    def result(self):
+        return {
+            'rows': self.rows,
+            f'over_{self.min_age}': self.over_min_age,
+            'age_histogram': dict(zip(self.bins[:-1].tolist(), self.histogram.tolist())),
+            'avg_age_by_domain': {key: total / count for key, (count, total) in self.domains.items()},
+        }
+
+
+def run_report(batch_size=10000, backend=None, min_age=25):
+    report = BatchReport(min_age)
+    for arrays in stream_arrays(batch_size, backend):
+        report.add(arrays)
+    return report.result()
+
+
+def benchmark(rows=200_000, batch_size=10000):
+    """Compares the row-by-row batch_processing filter with the vectorized report"""
+    make_user_data = __import__('bench_row_formats').make_user_data
+    with tempfile.TemporaryDirectory() as tmp:
+        streaming.SQLITE_PATH = os.path.join(tmp, 'user_data.db')
+        make_user_data(streaming.SQLITE_PATH, rows)
+
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull:
+            # Python-side age filter, as batch_processing did before push-down
+            batch_module.batch_processing(batch_size, predicates=(lambda user: user['age'] > 25,),
+                                          backend='sqlite', out=devnull)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_report(batch_size, backend='sqlite')
+        vectorized = time.perf_counter() - start
+
+    print(f"batch_processing loop: {rows / loop:>12.0f} rows/s")
+    print(f"vectorized report:     {rows / vectorized:>12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:]))
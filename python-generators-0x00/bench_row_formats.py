@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import streaming
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+
+def make_user_data(path, rows):
+    """Creates a synthetic SQLite user_data table"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE user_data (user_id TEXT PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO user_data VALUES (?, ?, ?, ?)",
+        ((str(uuid.uuid4()), f"user{i}", f"user{i}@example.com", 18 + i % 80) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(row_format, batch_size):
+    """Consumes the whole stream, returning (seconds, peak traced bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for batch in stream_users_in_batches(batch_size, backend='sqlite', row_format=row_format):
+        pass
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(rows=200_000, batch_size=1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        streaming.SQLITE_PATH = os.path.join(tmp, 'user_data.db')
+        make_user_data(streaming.SQLITE_PATH, rows)
+        print(f"{'format':<8} {'rows/s':>12} {'peak KiB':>10}")
+        for row_format in streaming.ROW_FORMATS:
+            elapsed, peak = run(row_format, batch_size)
+            print(f"{row_format:<8} {rows / elapsed:>12.0f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
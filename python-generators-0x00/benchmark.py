@@ -0,0 +1,158 @@
+"""Benchmarks the user_data streaming strategies against a synthetic SQLite table.
+
+    python benchmark.py --rows 1000000 --output bench.json
+
+Each strategy runs in a fresh process so peak RSS is its own, and the JSON
+report carries the git commit so runs can be compared across commits.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import tempfile
+import time
+from queue import Empty
+
+import streaming
+
+stream_users = __import__('0-stream_users').stream_users
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+make_user_data = __import__('bench_row_formats').make_user_data
+
+
+def fetchall_users(batch_size):
+    conn = sqlite3.connect(streaming.SQLITE_PATH)
+    rows = conn.execute("SELECT * FROM user_data").fetchall()
+    conn.close()
+    yield rows
+
+
+def offset_pagination(page_size):
+    """lazy_pagination's LIMIT/OFFSET walk with a connection per page, on SQLite"""
+    offset = 0
+    while True:
+        conn = sqlite3.connect(streaming.SQLITE_PATH)
+        page = conn.execute("SELECT * FROM user_data LIMIT ? OFFSET ?", (page_size, offset)).fetchall()
+        conn.close()
+        if not page:
+            break
+        yield page
+        offset += page_size
+
+
+def keyset_pagination(page_size):
+    """lazy_pagination_keyset's walk on SQLite: one connection, seek on user_id"""
+    conn = sqlite3.connect(streaming.SQLITE_PATH)
+    last_id = ''
+    while True:
+        page = conn.execute("SELECT * FROM user_data WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                            (last_id, page_size)).fetchall()
+        if not page:
+            break
+        yield page
+        last_id = page[-1][0]
+    conn.close()
+
+
+STRATEGIES = {
+    'stream_users': lambda batch_size: ([row] for row in stream_users(backend='sqlite')),
+    'stream_users_tuple': lambda batch_size: ([row] for row in stream_users(backend='sqlite', row_format='tuple')),
+    'stream_users_in_batches': lambda batch_size: stream_users_in_batches(batch_size, backend='sqlite'),
+    'stream_users_in_batches_tuple': lambda batch_size: stream_users_in_batches(batch_size, backend='sqlite',
+                                                                                row_format='tuple'),
+    'lazy_pagination_offset': offset_pagination,
+    'lazy_pagination_keyset': keyset_pagination,
+    'fetchall': fetchall_users,
+}
+
+
+def run_strategy(name, db_path, batch_size, results):
+    """Child process: consumes one strategy and reports its numbers, or the error it raised"""
+    streaming.SQLITE_PATH = db_path
+    rows = 0
+    first_row = None
+    start = time.perf_counter()
+    try:
+        for batch in STRATEGIES[name](batch_size):
+            if first_row is None:
+                first_row = time.perf_counter() - start
+            rows += len(batch)
+    except Exception as e:
+        results.put({'strategy': name, 'error': f"{type(e).__name__}: {e}"})
+        return
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if platform.system() == 'Darwin' else 1024
+    results.put({
+        'strategy': name,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else None,
+        'time_to_first_row': first_row,
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_for_result(name, proc, queue):
+    """The child's report; an error record if it died without sending one"""
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            if not proc.is_alive():
+                try:
+                    return queue.get(timeout=1.0)  # It may have reported just before exiting
+                except Empty:
+                    return {'strategy': name, 'error': f"process exited with code {proc.exitcode}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--strategies', nargs='+', choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')  # Fresh interpreter, so RSS isn't inherited
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'user_data.db')
+        make_user_data(db_path, args.rows)
+        results = []
+        for name in args.strategies:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_strategy, args=(name, db_path, args.batch_size, queue))
+            proc.start()
+            results.append(wait_for_result(name, proc, queue))
+            proc.join()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'rows': args.rows,
+        'batch_size': args.batch_size,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import json
+import os
+
+batch_module = __import__('1-batch_processing')
+
+
+class Checkpoint:
+    """Last fully processed user_id and batch number, kept in a small JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, last_id, batch):
+        # Write-then-rename so a crash never leaves a half-written state file
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'last_id': last_id, 'batch': batch}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def last_user_id(batch):
+    """user_id of the final row, whatever row format the batch uses"""
+    if isinstance(batch, dict):
+        return batch['user_id'][-1]
+    row = batch[-1]
+    if isinstance(row, dict):
+        return row['user_id']
+    if hasattr(row, 'user_id'):
+        return row.user_id
+    return row[0]
+
+
+def checkpointed(open_batches, state_file):
+    """Generator yielding (batch_number, batch) and checkpointing as it goes.
+
+    open_batches(after_id) must return batches in user_id order starting
+    just past after_id (None for a fresh scan). A batch is checkpointed
+    only when the consumer asks for the next one, so after a crash at most
+    the batch in hand is handed over again, under the same batch_number;
+    a consumer that records the last batch_number it committed can drop
+    that repeat and get exactly-once delivery. The state file is removed
+    once the scan completes, so the next run starts from scratch.
+    """
+    checkpoint = Checkpoint(state_file)
+    state = checkpoint.load() or {'last_id': None, 'batch': 0}
+    batch_number = state['batch']
+    for batch in open_batches(state['last_id']):
+        batch_number += 1
+        yield batch_number, batch
+        checkpoint.save(last_user_id(batch), batch_number)
+    checkpoint.clear()
+
+
+def resumable_users_in_batches(batch_size, state_file, backend=None, row_format='dict'):
+    """stream_users_in_batches that resumes from state_file after a restart"""
+    return checkpointed(
+        lambda after_id: batch_module.stream_users_in_batches(
+            batch_size, backend=backend, row_format=row_format, after_id=after_id or ''),
+        state_file
+    )
+
+
+def resumable_lazy_pagination(page_size, state_file):
+    """Keyset lazy_pagination that resumes from state_file after a restart"""
+    paginate_module = __import__('2-lazy_paginate')  # Pulls in seed / mysql.connector
+    return checkpointed(
+        lambda after_id: paginate_module.lazy_pagination_keyset(page_size, after_id=after_id),
+        state_file
+    )
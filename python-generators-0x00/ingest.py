@@ -0,0 +1,172 @@
+import csv
+import io
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import seed
+
+INSERT_QUERY = f"INSERT IGNORE INTO {seed.TABLE_NAME} (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
+
+
+def split_shards(data_file, shard_size):
+    """Splits the CSV body into byte ranges that start and end on line boundaries"""
+    size = os.path.getsize(data_file)
+    with open(data_file, 'rb') as f:
+        columns = next(csv.reader([f.readline().decode()]))
+        bounds = [f.tell()]
+        while bounds[-1] + shard_size < size:
+            f.seek(bounds[-1] + shard_size)
+            f.readline()  # Move to the start of the next full line
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return columns, list(zip(bounds, bounds[1:]))
+
+
+def validate_row(row):
+    """Returns an insert-ready tuple, or None if the row is malformed"""
+    try:
+        name = row['name'].strip()
+        email = row['email'].strip()
+        age = int(float(row['age']))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if not name or '@' not in email or age < 0:
+        return None
+    return (str(uuid.uuid4()), name, email, age)
+
+
+def parse_shard(data_file, columns, start, end, batch_size):
+    """Worker: parses one byte range into batches and counts rejected rows"""
+    with open(data_file, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode()
+    batches, batch, failed = [], [], 0
+    for row in csv.DictReader(io.StringIO(text, newline=''), fieldnames=columns):
+        record = validate_row(row)
+        if record is None:
+            failed += 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches, failed
+
+
+def write_batches(batches, summary, lock):
+    """Writer: drains the queue into its own connection until it sees None.
+
+    A writer that can't connect, or whose connection breaks, keeps draining
+    and counts its batches as failed, so the producer never blocks on a
+    queue nobody reads.
+    """
+    connection = cursor = None
+    try:
+        connection = seed.connect_to_prodev()
+        if connection is not None:
+            cursor = connection.cursor()
+    except Exception as err:
+        print(f"Writer could not connect: {err}")
+    while True:
+        batch = batches.get()
+        if batch is None:
+            break
+        inserted, skipped, failed = 0, 0, len(batch)
+        if cursor is not None:
+            try:
+                cursor.executemany(INSERT_QUERY, batch)
+                connection.commit()
+                inserted, skipped, failed = cursor.rowcount, len(batch) - cursor.rowcount, 0
+            except Exception as err:
+                print(f"Error inserting batch: {err}")
+                try:
+                    connection.rollback()
+                except Exception:
+                    pass
+        with lock:
+            summary['inserted'] += inserted
+            summary['skipped'] += skipped
+            summary['failed'] += failed
+    for handle in (cursor, connection):
+        try:
+            if handle is not None:
+                handle.close()
+        except Exception as err:
+            print(f"Error closing writer connection: {err}")
+
+
+def put_while_writing(batches, item, threads):
+    """queue.put that gives up instead of blocking forever once every writer has died"""
+    while True:
+        try:
+            batches.put(item, timeout=1.0)
+            return
+        except queue.Full:
+            if not any(thread.is_alive() for thread in threads):
+                raise RuntimeError("All writer threads have stopped")
+
+
+def ingest(data_file, workers=None, writers=4, batch_size=5000,
+           shard_size=8 * 1024 * 1024, max_pending=16):
+    """Parses the CSV in a process pool and loads it through N writer connections.
+
+    The batch queue holds at most max_pending batches and at most
+    2 * workers shards are parsed ahead, so a slow database throttles the
+    parsers instead of letting parsed rows pile up in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    columns, shards = split_shards(data_file, shard_size)
+    summary = {'inserted': 0, 'skipped': 0, 'failed': 0}
+    lock = threading.Lock()
+    batches = queue.Queue(maxsize=max_pending)
+    threads = [threading.Thread(target=write_batches, args=(batches, summary, lock))
+               for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            shards = iter(shards)
+            while True:
+                for shard in shards:
+                    pending.add(pool.submit(parse_shard, data_file, columns, *shard, batch_size))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parsed, failed = future.result()
+                    with lock:
+                        summary['failed'] += failed
+                    for batch in parsed:
+                        put_while_writing(batches, batch, threads)  # Blocks while the writers are behind
+    finally:
+        for _ in threads:
+            try:
+                put_while_writing(batches, None, threads)
+            except RuntimeError:
+                break
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.perf_counter() - start
+    total = sum(summary.values())
+    rate = total / elapsed if elapsed else 0
+    print(f"Inserted {summary['inserted']}, skipped {summary['skipped']}, "
+          f"failed {summary['failed']} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return summary
+
+
+if __name__ == "__main__":
+    ingest('user_data.csv')
@@ -2,6 +2,7 @@ import mysql
 import mysql.connector
 from mysql.connector import errorcode
 import csv
+import time
 import uuid
 
 DB_CONFIG = {
@@ -60,7 +61,9 @@ def create_table(connection):
     finally:
         cursor.close()
 
-def insert_data(connection, data_file):
+def insert_data(connection, data_file, bulk=False, chunk_size=5000):
+    if bulk:
+        return insert_data_bulk(connection, data_file, chunk_size)
     cursor = connection.cursor()
     with open(data_file, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -78,4 +81,64 @@ def insert_data(connection, data_file):
             except mysql.connector.Error as err:
                 print(f"Error inserting row: {err}")
     connection.commit()
-    cursor.close()
\ No newline at end of file
+    cursor.close()
+
+def read_csv_chunks(data_file, chunk_size):
+    """Generator that yields lists of insert-ready rows from the CSV"""
+    with open(data_file, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        chunk = []
+        for row in reader:
+            chunk.append((str(uuid.uuid4()), row['name'], row['email'], row['age']))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def insert_data_bulk(connection, data_file, chunk_size=5000):
+    """Loads the CSV in chunks, letting unique_email drop duplicates server-side"""
+    cursor = connection.cursor()
+    query = f"INSERT IGNORE INTO {TABLE_NAME} (user_id, name, email, age) VALUES (%s, %s, %s, %s)"
+    read = inserted = 0
+    start = time.perf_counter()
+    for chunk in read_csv_chunks(data_file, chunk_size):
+        try:
+            cursor.executemany(query, chunk)
+            connection.commit()  # Commit per chunk so a failure only loses one chunk
+            inserted += cursor.rowcount
+        except mysql.connector.Error as err:
+            connection.rollback()
+            print(f"Error inserting chunk: {err}")
+        read += len(chunk)
+    elapsed = time.perf_counter() - start
+    rate = read / elapsed if elapsed else 0
+    print(f"Inserted {inserted} of {read} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    cursor.close()
+    return inserted
+
+def load_data_infile(connection, data_file):
+    """Bulk load with LOAD DATA; the connection needs allow_local_infile=True"""
+    with open(data_file, newline='') as csvfile:
+        columns = next(csv.reader(csvfile))
+    cursor = connection.cursor()
+    start = time.perf_counter()
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {TABLE_NAME} "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"IGNORE 1 LINES ({', '.join(columns)}) SET user_id = UUID()",
+            (data_file,)
+        )
+        connection.commit()
+        inserted = cursor.rowcount
+    except mysql.connector.Error as err:
+        connection.rollback()
+        print(f"Failed loading data: {err}")
+        inserted = 0
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+    rate = inserted / elapsed if elapsed else 0
+    print(f"Loaded {inserted} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return inserted
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import queue
+from multiprocessing import Pool
+
+import streaming
+
+KEYSPACE = 16 ** 8  # user_id is a UUID, so its first 8 hex digits are uniform
+BATCH, DONE, FAILED = 'batch', 'done', 'failed'
+
+_results = None  # Result queue, set in each worker by init_worker
+
+
+def shard_bounds(shards):
+    """Splits the UUID keyspace into `shards` [low, high) user_id ranges"""
+    cuts = [format(i * KEYSPACE // shards, '08x') for i in range(1, shards)]
+    lows = [None] + cuts
+    highs = cuts + [None]
+    return list(zip(lows, highs))
+
+
+def range_query(low, high, backend=None):
+    """SELECT for one user_id range; open ends are left unbounded"""
+    mark = streaming.placeholder(backend)
+    clauses, params = [], []
+    if low is not None:
+        clauses.append(f"user_id >= {mark}")
+        params.append(low)
+    if high is not None:
+        clauses.append(f"user_id < {mark}")
+        params.append(high)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+    return f"SELECT * FROM user_data{where}", tuple(params)
+
+
+def init_worker(results, sqlite_path):
+    global _results
+    _results = results
+    streaming.SQLITE_PATH = sqlite_path  # Spawned workers don't inherit the parent's override
+
+
+def scan_range(task):
+    """Worker: streams one range over its own connection, sending back process(batch) as each is done"""
+    index, process, low, high, batch_size, backend, row_format = task
+    try:
+        query, params = range_query(low, high, backend)
+        for columns, rows in streaming.stream_batches(query, params, batch_size, backend):
+            _results.put((index, BATCH, process(streaming.format_batch(columns, rows, row_format))))
+    except Exception as e:
+        _results.put((index, FAILED, e))
+    else:
+        _results.put((index, DONE, None))
+
+
+def sharded_scan(process, workers=None, shards=None, batch_size=1000, backend=None,
+                 row_format='dict', ordered=True, ahead=None):
+    """Scans user_data in parallel, one process and connection per user_id range.
+
+    process must be a picklable (module-level) function; it receives each
+    batch in row_format and its return values are yielded back as batches
+    finish. The result queue is bounded, so workers pause while the
+    consumer is behind. With ordered=False results come as soon as they
+    arrive. With ordered=True they come in shard order: a shard is only
+    started once it is within `ahead` shards (default: workers) of the one
+    being yielded, and results of those later shards are held in memory
+    until it finishes, so at most `ahead` shards' results are buffered.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4  # Smaller shards keep stragglers short
+    backend = backend or streaming.DEFAULT_BACKEND
+    ahead = ahead or workers
+    tasks = [(index, process, low, high, batch_size, backend, row_format)
+             for index, (low, high) in enumerate(shard_bounds(shards))]
+    results = multiprocessing.Queue(maxsize=workers * 4)
+    with Pool(workers, init_worker, (results, streaming.SQLITE_PATH)) as pool:
+        started = []
+        held, finished, current, remaining = {}, set(), 0, len(tasks)
+        while remaining:
+            limit = current + ahead if ordered else len(tasks)
+            while len(started) < min(limit, len(tasks)):
+                started.append(pool.apply_async(scan_range, (tasks[len(started)],)))
+            try:
+                index, kind, value = results.get(timeout=1.0)
+            except queue.Empty:
+                for scan in started:
+                    if scan.ready() and not scan.successful():
+                        scan.get()  # Re-raises whatever stopped a worker outside scan_range's handler
+                continue
+            if kind == FAILED:
+                raise value
+            if kind == BATCH:
+                if not ordered or index == current:
+                    yield value
+                else:
+                    held.setdefault(index, []).append(value)
+                continue
+            remaining -= 1
+            finished.add(index)
+            while current in finished:
+                current += 1
+                yield from held.pop(current, ())
@@ -0,0 +1,155 @@
+import json
+import mmap
+import os
+from array import array
+
+batch_module = __import__('1-batch_processing')
+
+STRING_COLUMNS = ('user_id', 'name', 'email')
+VERSION = 1
+
+
+def export_snapshot(path, batch_size=10000, backend=None):
+    """Writes user_data to a columnar snapshot directory, one batch at a time.
+
+    age.i32 holds fixed-width ages; each string column is a <col>.data blob
+    of UTF-8 values plus <col>.offsets (uint64, rows + 1 entries) marking
+    where each value starts and ends. Columns are written to .tmp files and
+    renamed into place only once complete, so a Snapshot already open on
+    path keeps its mappings of the old files. meta.json is removed before
+    the renames and written last, so a half-swapped snapshot is never
+    mistaken for a complete one.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    names = ['age.i32'] + [f'{column}.{part}' for column in STRING_COLUMNS for part in ('data', 'offsets')]
+    files = {}
+    rows = 0
+    try:
+        for name in names:
+            files[name] = open(os.path.join(path, name + '.tmp'), 'wb')
+        ends = dict.fromkeys(STRING_COLUMNS, 0)
+        for column in STRING_COLUMNS:
+            array('Q', [0]).tofile(files[f'{column}.offsets'])
+        for batch in batch_module.stream_users_in_batches(batch_size, backend=backend, row_format='columns'):
+            array('i', map(int, batch['age'])).tofile(files['age.i32'])
+            for column in STRING_COLUMNS:
+                offsets = array('Q')
+                chunk = bytearray()
+                for value in batch[column]:
+                    chunk += str(value).encode()
+                    offsets.append(ends[column] + len(chunk))
+                files[f'{column}.data'].write(chunk)
+                offsets.tofile(files[f'{column}.offsets'])
+                ends[column] += len(chunk)
+            rows += len(batch['age'])
+    except BaseException:
+        for name, f in files.items():
+            f.close()
+            os.remove(f.name)
+        raise
+    for f in files.values():
+        f.close()
+    try:
+        os.remove(meta_path)
+    except FileNotFoundError:
+        pass
+    for name in names:
+        os.replace(os.path.join(path, name + '.tmp'), os.path.join(path, name))
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump({'version': VERSION, 'rows': rows, 'columns': ['age', *STRING_COLUMNS]}, f)
+    os.replace(meta_path + '.tmp', meta_path)
+    return rows
+
+
+class StringColumn:
+    """Offset-indexed view over one string column; values decode on access"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        """Zero-copy bytes view of value i; release() it before closing the snapshot"""
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.raw(i), 'utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Snapshot:
+    """Memory-maps a snapshot written by export_snapshot.
+
+    snap.ages is a memoryview of int32 straight over the page cache (wrap it
+    with numpy.frombuffer for vectorized work) and snap.column(name) gives
+    offset-indexed access to the string columns without copying them.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.meta['version']}")
+        self.rows = self.meta['rows']
+        self._maps = []
+        self.ages = self._map(os.path.join(path, 'age.i32'), 'i')
+        self._columns = {
+            column: StringColumn(self._map(os.path.join(path, f'{column}.offsets'), 'Q'),
+                                 self._map(os.path.join(path, f'{column}.data'), 'B'))
+            for column in STRING_COLUMNS
+        }
+        if len(self.ages) != self.rows or any(len(c) != self.rows for c in self._columns.values()):
+            self.close()
+            raise ValueError(f"Snapshot at {path} changed while opening; open it again")
+
+    def _map(self, filename, fmt):
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b'').cast(fmt)  # mmap refuses empty files
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        view = memoryview(mm).cast(fmt)
+        self._maps.append(view)
+        return view
+
+    def column(self, name):
+        if name == 'age':
+            return self.ages
+        return self._columns[name]
+
+    def close(self):
+        """Unmaps the column files; safe to call more than once.
+
+        A buffer still in use elsewhere (a raw() slice, a numpy array over
+        ages) keeps its mmap open and close raises BufferError; release it
+        and call close again.
+        """
+        busy = []
+        # Views must be released before their mmaps can close
+        for obj in reversed(self._maps):
+            try:
+                if isinstance(obj, memoryview):
+                    obj.release()
+                else:
+                    obj.close()
+            except BufferError:
+                busy.append(obj)
+        self._maps = busy[::-1]
+        if busy:
+            raise BufferError(f"{len(busy)} snapshot buffers are still exported")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,141 @@
+import math
+
+import streaming
+
+
+class RunningStats:
+    """Single-pass mean/variance (Welford) that can be merged across shards"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0  # Exact sum for the reported mean; Welford's running mean drifts in the last digits
+        self._mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.total += value
+        value = float(value)
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self.m2 += delta * (value - self._mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Folds another shard's stats into this one (Chan et al.)"""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.total, self._mean, self.m2 = other.count, other.total, other._mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self.total += other.total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return float(self.total / self.count) if self.count else 0.0
+
+    @property
+    def variance(self):
+        """Population variance, matching STDDEV_POP on the database side"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {'count': self.count, 'avg': self.mean, 'min': self.min,
+                'max': self.max, 'stddev': self.stddev}
+
+
+class HistogramSketch:
+    """Bounded-memory, mergeable histogram for approximate percentiles.
+
+    Values are counted in buckets of width `resolution`; whenever more than
+    max_buckets are live the width doubles and buckets are folded, so
+    memory stays bounded and the error stays within one bucket width.
+    """
+
+    def __init__(self, resolution=1.0, max_buckets=2048):
+        self.resolution = resolution
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, value, weight=1):
+        key = math.floor(float(value) / self.resolution)
+        self.buckets[key] = self.buckets.get(key, 0) + weight
+        self.count += weight
+        if len(self.buckets) > self.max_buckets:
+            self._coarsen()
+
+    def _coarsen(self):
+        folded = {}
+        for key, weight in self.buckets.items():
+            folded[key // 2] = folded.get(key // 2, 0) + weight
+        self.buckets = folded
+        self.resolution *= 2
+
+    def merge(self, other):
+        while self.resolution < other.resolution:
+            self._coarsen()
+        for key, weight in other.buckets.items():
+            # Bucket midpoints re-bin correctly when other is finer than self
+            self.add((key + 0.5) * other.resolution, weight)
+        return self
+
+    def percentile(self, p):
+        """Value at percentile p (0-100), reported as the bucket midpoint"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return (key + 0.5) * self.resolution
+        return (max(self.buckets) + 0.5) * self.resolution
+
+    def percentiles(self, ps=(25, 50, 75, 90, 99)):
+        return {p: self.percentile(p) for p in ps}
+
+
+def aggregate_ages(backend=None):
+    """Pushes COUNT/AVG/MIN/MAX/STDDEV down to the database in one query"""
+    backend = backend or streaming.DEFAULT_BACKEND
+    if backend == 'mysql':
+        stddev = "STDDEV_POP(age)"
+    else:
+        # SQLite has no STDDEV; return the variance and take the root here. Two
+        # passes (deviations from the mean) rather than AVG(age * age) - AVG(age)²,
+        # which loses most of its digits to cancellation when the spread is small.
+        stddev = ("(SELECT AVG((u.age - m.avg) * (u.age - m.avg)) FROM user_data u, "
+                  "(SELECT AVG(age) AS avg FROM user_data) m)")
+    query = f"SELECT COUNT(age), AVG(age), MIN(age), MAX(age), {stddev} FROM user_data"
+    for _, rows in streaming.stream_batches(query, backend=backend):
+        count, avg, low, high, spread = rows[0]
+        if backend != 'mysql' and spread is not None:
+            spread = math.sqrt(max(float(spread), 0.0))
+        return {'count': count, 'avg': avg, 'min': low, 'max': high, 'stddev': spread}
+
+
+def stream_age_stats(ages, resolution=1.0, max_buckets=2048):
+    """Consumes an iterable of ages in one pass, returning (RunningStats, HistogramSketch)"""
+    stats = RunningStats()
+    sketch = HistogramSketch(resolution, max_buckets)
+    for age in ages:
+        stats.add(age)
+        sketch.add(age)
+    return stats, sketch
@@ -0,0 +1,127 @@
+import operator
+import os
+import sqlite3
+
+SQLITE_PATH = 'user_data.db'
+DEFAULT_BACKEND = os.environ.get('USER_DATA_BACKEND', 'sqlite')
+
+
+def connect(backend=None):
+    """Opens a connection to the user_data store: 'sqlite' or 'mysql' (ALX_prodev)"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'sqlite':
+        return sqlite3.connect(SQLITE_PATH)
+    if backend == 'mysql':
+        import seed  # Only needs mysql.connector when MySQL is actually used
+        return seed.connect_to_prodev()
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+class UserRecord:
+    """Lightweight user_data row; __slots__ avoids a per-row __dict__"""
+    __slots__ = ('user_id', 'name', 'email', 'age')
+
+    def __init__(self, user_id, name, email, age):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    def __repr__(self):
+        return f"UserRecord({self.user_id!r}, {self.name!r}, {self.email!r}, {self.age!r})"
+
+
+ROW_FORMATS = ('dict', 'tuple', 'record', 'columns')
+
+
+def format_batch(columns, rows, row_format='dict'):
+    """Converts a fetched batch to the requested shape.
+
+    'dict' builds one dict per row, 'tuple' passes driver tuples through,
+    'record' builds UserRecord objects (SELECT * on user_data only) and
+    'columns' returns one {column: tuple_of_values} mapping for the batch.
+    """
+    if row_format == 'dict':
+        return [dict(zip(columns, row)) for row in rows]
+    if row_format == 'tuple':
+        return rows
+    if row_format == 'record':
+        return [UserRecord(*row) for row in rows]
+    if row_format == 'columns':
+        return dict(zip(columns, zip(*rows)))
+    raise ValueError(f"Unknown row format: {row_format}")
+
+
+def placeholder(backend=None):
+    """Bind parameter marker for the backend's driver"""
+    return '%s' if (backend or DEFAULT_BACKEND) == 'mysql' else '?'
+
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '=': operator.eq, '!=': operator.ne,
+}
+# Columns and operators that may be pushed into the WHERE clause
+PUSHDOWN = {
+    'age': ('<', '<=', '>', '>=', '=', '!='),
+    'email': ('=',),
+}
+
+
+def build_where(predicates, backend=None):
+    """Splits predicates into a parameterized WHERE clause and a Python residual.
+
+    A predicate is either a (column, op, value) tuple or a callable taking
+    a row dict. Tuples on PUSHDOWN columns become SQL; everything else is
+    returned in the residual list to be checked row by row.
+    """
+    clauses, params, residual = [], [], []
+    for predicate in predicates or ():
+        if not callable(predicate):
+            column, op, value = predicate
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator: {op}")
+            if op in PUSHDOWN.get(column, ()):
+                clauses.append(f"{column} {op} {placeholder(backend)}")
+                params.append(value)
+                continue
+        residual.append(predicate)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+    return where, tuple(params), residual
+
+
+def residual_filter(columns, residual):
+    """Builds a row-tuple test for the predicates build_where couldn't translate"""
+    index = {name: i for i, name in enumerate(columns)}
+    checks = []
+    for predicate in residual:
+        if callable(predicate):
+            checks.append(lambda row, p=predicate: p(dict(zip(columns, row))))
+        else:
+            column, op, value = predicate
+            checks.append(lambda row, i=index[column], f=OPERATORS[op], v=value: f(row[i], v))
+    return lambda row: all(check(row) for check in checks)
+
+
+def stream_batches(query, params=(), batch_size=1000, backend=None):
+    """Generator yielding (columns, rows) with at most batch_size tuples per batch.
+
+    MySQL uses an unbuffered cursor so rows stay on the server until fetched,
+    and SQLite steps its cursor with fetchmany, so memory stays flat
+    regardless of table size.
+    """
+    backend = backend or DEFAULT_BACKEND
+    conn = connect(backend)
+    cursor = conn.cursor(buffered=False) if backend == 'mysql' else conn.cursor()
+    try:
+        cursor.execute(query, params)
+        columns = tuple(col[0] for col in cursor.description)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        # Closing an unbuffered MySQL cursor would drain the remaining rows,
+        # so just drop the connection
+        conn.close()